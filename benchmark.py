@@ -0,0 +1,182 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        Reproducible benchmark of the median engines. Every engine is run over a matrix of generated datasets (size, column order, ratio of malformed lines, number of files) in a fresh process, recording wall time, lines per second, peak RSS and function call counts. Results are written as JSON and compared with a stored baseline so regressions are flagged.
+"""
+
+from contextlib import redirect_stdout
+import argparse
+import cProfile
+import importlib
+import itertools
+import json
+import os
+import platform
+import pstats
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import gentestfile
+
+ENGINES = ("heap_median", "qs_median", "stat_median", "hist_median", "np_median", "sketch_median") # modules exposing compute_stats(file_urls)
+SIZES = (10000, 100000, 1000000)
+ORDERS = ("age, fname, lname", "fname, age, lname") # column orders of age_fnm_lnm.csv and fnm_age_lnm.csv
+BAD_RATIOS = (0, 0.01)
+FILE_COUNTS = (1, 8)
+FULL_SIZES = (10000, 100000, 1000000, 10000000) # --full: the 10K to 10M rows of the request, over up to 10K files
+FULL_FILE_COUNTS = (1, 8, 10000)
+SEED = 2020
+THRESHOLD = 0.10 # relative slowdown (or memory growth) flagged as a regression
+NOISE_FLOOR = 0.05 # seconds; smaller slowdowns are timer noise and never flagged
+
+
+def run_matrix(engines, sizes, orders, bad_ratios, file_counts, data_dir, repeat=1, calls=True, seed=SEED):
+    """
+    Benchmarks every engine on every dataset of the matrix. Datasets are generated in data_dir on first use and reused afterwards. Returns a list of result dictionaries.
+    """
+    results = []
+    for rows, order, bad_ratio, files in itertools.product(sizes, orders, bad_ratios, file_counts):
+        urls = dataset(data_dir, rows, order, bad_ratio, files, seed)
+        for engine in engines:
+            result = {"engine": engine, "rows": rows, "order": order, "bad_ratio": bad_ratio, "files": files}
+            result.update(measure(engine, urls, repeat, calls))
+            results.append(result)
+            print(format_row(result), file=sys.stderr, flush=True)
+
+    return results
+
+def dataset(data_dir, rows, order, bad_ratio, files, seed=SEED):
+    """Returns the paths of a generated dataset, writing it first if it is not in data_dir yet."""
+    name = "_".join([str(rows), order.replace(", ", "-"), str(bad_ratio), str(files), str(seed)])
+    width = len(str(files - 1))
+    paths = [os.path.join(data_dir, name, "part" + str(i).zfill(width) + ".csv") for i in range(files)]
+    if (not all(os.path.exists(path) for path in paths)):
+        paths = gentestfile.generate(os.path.join(data_dir, name), rows, files, order, "uniform", bad_ratio, seed)
+
+    return paths
+
+def measure(engine, urls, repeat=1, calls=True):
+    """
+    Runs an engine over the urls in fresh processes: repeat timed runs (the fastest is kept) and, with calls, one run under cProfile to count function calls.
+    """
+    runs = [run_child(engine, urls, False) for i in range(repeat)]
+    best = min(runs, key=lambda run: run["wall"])
+    result = {"lines": best["lines"], "wall": round(best["wall"], 4), "lines_per_sec": round(best["lines"] / best["wall"]) if best["wall"] > 0 else None,
+        "peak_rss_kb": max(run["peak_rss_kb"] for run in runs), "calls": None}
+    if (calls):
+        result["calls"] = run_child(engine, urls, True)["calls"]
+
+    return result
+
+def run_child(engine, urls, profile):
+    """Measures a single run of an engine in a new interpreter, so peak RSS and imports are not shared between runs."""
+    command = [sys.executable, os.path.abspath(__file__), "--measure", engine] + (["--profile"] if profile else []) + ["--"] + urls
+    output = subprocess.run(command, stdout=subprocess.PIPE, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+def measure_here(engine, urls, profile):
+    """
+    Runs compute_stats of an engine in this process with its console output discarded. Returns the lines processed, wall time, peak RSS in KB (as reported by getrusage on Linux) and, when profiled, the number of function calls.
+    """
+    module = importlib.import_module(engine)
+    profiler = cProfile.Profile() if profile else None
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        start = time.perf_counter()
+        if (profiler != None):
+            profiler.enable()
+        avg, med, procd = module.compute_stats(urls)
+        if (profiler != None):
+            profiler.disable()
+        wall = time.perf_counter() - start
+
+    return {"lines": procd, "wall": wall, "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "calls": pstats.Stats(profiler).total_calls if profiler != None else None}
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """
+    Matches every result with the baseline result of the same engine and dataset and records its relative change in wall time and peak RSS. Returns the results that regressed by more than threshold (slowdowns must also exceed NOISE_FLOOR seconds).
+    """
+    previous = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        base = previous.get(result_key(result))
+        if (base == None):
+            continue
+        result["wall_change"] = round(result["wall"] / base["wall"] - 1, 4)
+        result["rss_change"] = round(result["peak_rss_kb"] / base["peak_rss_kb"] - 1, 4)
+        slower = result["wall_change"] > threshold and result["wall"] - base["wall"] > NOISE_FLOOR
+        if (slower or result["rss_change"] > threshold):
+            regressions.append(result)
+
+    return regressions
+
+def result_key(result):
+    """Identifies the engine and dataset of a result."""
+    return result["engine"], result["rows"], result["order"], result["bad_ratio"], result["files"]
+
+def format_row(result):
+    """Formats one result as a row of the comparison table."""
+    change = lambda key: "" if key not in result else "{:+.1%}".format(result[key])
+    return "{:<14} {:>9} {:<18} {:>5} {:>5} {:>9.3f} {:>11} {:>9.1f} {:>11} {:>8} {:>8}".format(result["engine"], result["rows"], result["order"], result["bad_ratio"], result["files"],
+        result["wall"], str(result["lines_per_sec"]), result["peak_rss_kb"] / 1024, str(result["calls"]), change("wall_change"), change("rss_change"))
+
+def print_table(results, regressions):
+    """Prints every result, flagging the regressions."""
+    print("{:<14} {:>9} {:<18} {:>5} {:>5} {:>9} {:>11} {:>9} {:>11} {:>8} {:>8}".format("engine", "rows", "order", "bad", "files", "wall s", "lines/s", "RSS MB", "calls", "wall", "RSS"))
+    for result in results:
+        print(format_row(result), "REGRESSION" if result in regressions else "")
+
+def parse_list(convert):
+    """Builds an argparse type for a comma separated list of values."""
+    return lambda text: tuple(convert(value) for value in text.split(","))
+
+
+
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--engines", type=parse_list(str), default=ENGINES, help="comma separated engine modules")
+    parser.add_argument("--full", action="store_true", help="default to the full matrix, up to 10M rows and 10K files per dataset, instead of stopping at 1M rows and 8 files")
+    parser.add_argument("--sizes", type=parse_list(int), help="comma separated row counts, e.g. 10000,10000000")
+    parser.add_argument("--orders", default=";".join(ORDERS), help="header orders separated by ';', e.g. 'age, fname, lname;fname, lname, age'")
+    parser.add_argument("--bad-ratios", type=parse_list(float), default=BAD_RATIOS, help="comma separated fractions of malformed lines")
+    parser.add_argument("--files", type=parse_list(int), help="comma separated numbers of files per dataset")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per measurement, the fastest is kept")
+    parser.add_argument("--no-calls", action="store_true", help="skip the profiled run that counts function calls")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--data-dir", help="directory for the generated datasets (default: a temporary directory)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--update-baseline", action="store_true", help="overwrite the baseline with these results")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="relative slowdown flagged as a regression (default 0.10)")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    parser.add_argument("--profile", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("urls", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if (args.measure != None): # child process started by run_child
+        print(json.dumps(measure_here(args.measure, args.urls, args.profile)))
+        sys.exit(0)
+
+    orders = tuple(order.strip() for order in args.orders.split(";"))
+    sizes = args.sizes if args.sizes != None else (FULL_SIZES if args.full else SIZES)
+    file_counts = args.files if args.files != None else (FULL_FILE_COUNTS if args.full else FILE_COUNTS)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = run_matrix(args.engines, sizes, orders, args.bad_ratios, file_counts, args.data_dir or tmp_dir, args.repeat, not args.no_calls, args.seed)
+    report = {"python": platform.python_version(), "platform": platform.platform(), "seed": args.seed, "results": results}
+    regressions = []
+    if (args.baseline != None and os.path.exists(args.baseline)):
+        with open(args.baseline, 'r') as basein:
+            regressions = compare(results, json.load(basein)["results"], args.threshold)
+    print_table(results, regressions)
+    if (args.output != None):
+        with open(args.output, 'w') as reportout:
+            json.dump(report, reportout, indent=1)
+    if (args.baseline != None and args.update_baseline):
+        with open(args.baseline, 'w') as baseout:
+            json.dump(report, baseout, indent=1)
+    if (len(regressions) > 0):
+        print(len(regressions), "regression(s) beyond", "{:.0%}".format(args.threshold), "of the baseline")
+        sys.exit(1)
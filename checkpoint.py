@@ -0,0 +1,149 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        Crash-safe checkpoints of long runs over many URLs or very large files. The running state of an engine is saved periodically, at most once per interval, and a run started with --resume continues from the last checkpoint and produces exactly the result of an uninterrupted run. A checkpoint records the URLs it was taken for, how many of them are finished, the byte offset and line number reached in the next one, the count, the age sum and the engine's data: hist_median's age histogram and first names, or the rows of heap_median's RecordStore (its heaps are rebuilt from the rows in row order, which reproduces them exactly). Checkpoints are only taken between blocks of lines, when every record before the offset has been consumed, and a file is resumed by stream_reader.stream_records reading its data up to the offset without parsing it; columnar files are read whole and never checkpointed part way.
+
+        The checkpoint file is a small pickle replaced atomically (written to a temporary file, synced and renamed over the old one), so a crash at any point leaves the previous checkpoint intact. Rows are appended to two side files (FILE.ages and FILE.offsets) holding only the rows added since the last checkpoint; the checkpoint file records how many of them are valid, so a crash half way through an append is discarded on resume. The files are removed once the run is complete.
+"""
+
+from array import array
+import os
+import pickle
+import time
+
+import instrument
+import parallel
+
+CHECKPOINT_INTERVAL = 30.0 # seconds between checkpoints by default
+VERSION = 1 # format of the checkpoint file, checkpoints of another version are not resumed
+ROW_FILES = ((".ages", 'H'), (".offsets", 'Q')) # side files holding the rows of a "rows" checkpoint
+
+
+class Checkpoint:
+    """
+    The checkpoint of a run of kind "hist" or "rows" (see the module docstring) over file_urls. The position of a run is (done, offset, line_num): the number of URLs finished (of tasks of parallel.map_summaries with more than one worker), the byte offset reached in the body of the next URL and the number of its lines before that offset, as passed to stream_reader.stream_records. The engine registers a snapshot function returning (cumulative age, count, data) with track and reports its position with advance; a checkpoint is saved when interval seconds have passed since the last one.
+    """
+
+    def __init__(self, path, kind, file_urls, workers=1, interval=CHECKPOINT_INTERVAL, resume=False):
+        self.path = path
+        self.kind = kind
+        self.urls = list(file_urls)
+        self.workers = parallel.resolve_workers(workers)
+        self.interval = interval
+        self.snapshot = None
+        self.rows = None # (ages, offsets) arrays whose new entries are appended to the side files
+        self.saved_rows = 0 # rows already in the side files
+        self.last = time.monotonic()
+        self.state = self.load() if resume else None
+        if (self.state != None):
+            self.saved_rows = self.state["rows"]
+
+    def position(self):
+        """Returns the position (done, offset, line_num) to start from."""
+        if (self.state == None):
+            return 0, 0, 1
+        return self.state["done"], self.state["offset"], self.state["line_num"]
+
+    def restore(self):
+        """Returns (cumulative age, count, data) saved in the checkpoint resumed from, or None when starting from the beginning."""
+        if (self.state == None):
+            return None
+        return self.state["total"], self.state["count"], self.state["data"]
+
+    def restore_rows(self):
+        """Returns the (ages, offsets) arrays saved in the checkpoint resumed from, which are empty when starting from the beginning."""
+        columns = []
+        for suffix, typecode in ROW_FILES:
+            column = array(typecode)
+            if (self.saved_rows > 0):
+                with open(self.path + suffix, 'rb') as rowin:
+                    column.fromfile(rowin, self.saved_rows)
+            columns.append(column)
+
+        return tuple(columns)
+
+    def track(self, snapshot, rows=None):
+        """Registers the function returning (cumulative age, count, data) of the run, and for kind "rows" the (ages, offsets) arrays rows are appended to."""
+        self.snapshot = snapshot
+        self.rows = rows
+
+    def advance(self, done, offset=0, line_num=1):
+        """Reports the position reached, saving a checkpoint if one is due."""
+        if (time.monotonic() - self.last >= self.interval):
+            self.save(done, offset, line_num)
+
+    def save(self, done, offset=0, line_num=1):
+        """Saves a checkpoint of the state returned by the snapshot function at the provided position. A checkpoint that cannot be written is reported and the run goes on."""
+        with instrument.stage("checkpoint"):
+            total, count, data = self.snapshot()
+            state = {"version": VERSION, "kind": self.kind, "urls": self.urls, "workers": self.workers, "done": done, "offset": offset, "line_num": line_num,
+                "total": total, "count": count, "data": data, "rows": self.saved_rows}
+            try:
+                if (self.rows != None):
+                    state["rows"] = self.append_rows()
+                instrument.flush()
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, 'wb') as stateout:
+                    pickle.dump(state, stateout, pickle.HIGHEST_PROTOCOL)
+                    stateout.flush()
+                    os.fsync(stateout.fileno())
+                os.replace(tmp_path, self.path)
+                self.saved_rows = state["rows"]
+            except OSError as err:
+                print("Unable to write checkpoint", self.path, ":", err, ". Continuing...")
+        self.last = time.monotonic()
+
+    def append_rows(self):
+        """Appends the rows added since the last checkpoint to the side files, dropping anything written after it. Returns the number of rows saved."""
+        for (suffix, typecode), column in zip(ROW_FILES, self.rows):
+            with open(self.path + suffix, 'ab') as rowout:
+                rowout.truncate(self.saved_rows * column.itemsize)
+                column[self.saved_rows:].tofile(rowout)
+                rowout.flush()
+                os.fsync(rowout.fileno())
+
+        return len(self.rows[0])
+
+    def load(self):
+        """Loads the checkpoint file, or returns None if there is none or it belongs to a different run."""
+        try:
+            with open(self.path, 'rb') as statein:
+                state = pickle.load(statein)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            print("Checkpoint", self.path, " is corrupt. Starting over...")
+            return None
+        if (not isinstance(state, dict) or state.get("version") != VERSION or state["kind"] != self.kind or state["urls"] != self.urls or state["workers"] != self.workers):
+            print("Checkpoint", self.path, " was taken for a different run. Starting over...")
+            return None
+        try:
+            missing = state["rows"] > 0 and any(os.path.getsize(self.path + suffix) < state["rows"] * array(typecode).itemsize for suffix, typecode in ROW_FILES)
+        except OSError:
+            missing = True
+        if (missing):
+            print("Checkpoint", self.path, " is missing rows. Starting over...")
+            return None
+
+        return state
+
+    def finish(self):
+        """Removes the checkpoint files of a completed run."""
+        for suffix in ("",) + tuple(suffix for suffix, typecode in ROW_FILES):
+            try:
+                os.remove(self.path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+def add_arguments(parser):
+    """Adds the checkpoint options to the argument parser of an executable."""
+    parser.add_argument("--checkpoint", metavar="FILE", help="periodically save the running state to FILE, removed once the run completes")
+    parser.add_argument("--checkpoint-interval", type=float, default=CHECKPOINT_INTERVAL, metavar="SECONDS", help="seconds between checkpoints (default %(default)s)")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint in FILE, if it was taken for the same urls and workers")
+
+def from_args(args, kind):
+    """Returns the Checkpoint requested by the options of add_arguments, or None if checkpoints are off."""
+    if (args.checkpoint == None):
+        return None
+    return Checkpoint(args.checkpoint, kind, args.urls, args.workers, args.checkpoint_interval, args.resume)
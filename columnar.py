@@ -0,0 +1,145 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        Reader of the binary columnar format written by preprocess.py. A columnar file holds validated records as a sequence of segments, each with a packed age column (uint8, or uint16 when an age exceeds 255), an offset-indexed blob of names and a footer with the row count, age sum, age histogram and first row of every age. Files are memory-mapped, so counts, sums and histograms are read from the footers without touching the rows and the age columns are exposed as zero-copy memoryviews.
+
+        Layout (little-endian): MAGIC, then for every segment its names blob, ages column, name offsets (count + 1 entries), footer (FOOTER, HIST_SLOTS uint64 counts, HIST_SLOTS int64 first rows, sources JSON), and finally TRAILER giving the position of the last footer. Each footer points to the footer of the previous segment, so appending a segment never rewrites existing data.
+"""
+
+from array import array
+from bisect import bisect_right
+import json
+import mmap
+import struct
+
+MAGIC = b"AGECOL\x00\x01"
+SEGMENT_MAGIC = b"AGESEGMT"
+END_MAGIC = b"AGECOLND"
+FOOTER = struct.Struct("<8sQQQQQQQ2s6x") # magic, rows, age sum, names, ages and offsets positions, previous footer, sources length, age and offset typecodes
+TRAILER = struct.Struct("<Q8s") # position of the last footer, END_MAGIC
+HIST_SLOTS = 1000 # ages are validated as 1-3 digits, so every age falls in [0, 999]
+
+
+class Segment:
+    """One segment of a columnar file: a view of its columns and the totals of its footer."""
+
+    def __init__(self, mapped, pos):
+        magic, self.count, self.total, self.names_start, ages_start, offsets_start, self.prev, sources_len, types = FOOTER.unpack_from(mapped, pos)
+        if (magic != SEGMENT_MAGIC):
+            raise OSError("Corrupt columnar segment at byte " + str(pos))
+        age_type, offset_type = types.decode("ascii")
+        size = array(age_type).itemsize
+        self.ages = memoryview(mapped)[ages_start:ages_start + self.count * size].cast(age_type)
+        size = array(offset_type).itemsize
+        self.offsets = memoryview(mapped)[offsets_start:offsets_start + (self.count + 1) * size].cast(offset_type)
+        pos += FOOTER.size
+        self.hist = memoryview(mapped)[pos:pos + 8 * HIST_SLOTS].cast('Q')
+        pos += 8 * HIST_SLOTS
+        self.firsts = memoryview(mapped)[pos:pos + 8 * HIST_SLOTS].cast('q')
+        pos += 8 * HIST_SLOTS
+        self.sources = json.loads(mapped[pos:pos + sources_len].decode("utf-8"))
+
+    def release(self):
+        """Releases the views into the mapping so it can be closed."""
+        for view in (self.ages, self.offsets, self.hist, self.firsts):
+            view.release()
+
+
+class ColumnarFile:
+    """
+    A memory-mapped columnar file. Rows are numbered across segments in the order they were converted; count, total and hist cover every segment. Use as a context manager, or call close, once the views of the age columns are no longer needed.
+    """
+
+    def __init__(self, path):
+        self.filein = open(path, 'rb')
+        try:
+            self.mapped = mmap.mmap(self.filein.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # empty file
+            self.filein.close()
+            raise OSError("File at " + path + " is not a columnar file")
+        self.segments = []
+        try:
+            if (self.mapped[:len(MAGIC)] != MAGIC or len(self.mapped) < len(MAGIC) + TRAILER.size):
+                raise OSError("File at " + path + " is not a columnar file")
+            pos, end = TRAILER.unpack_from(self.mapped, len(self.mapped) - TRAILER.size)
+            if (end != END_MAGIC):
+                raise OSError("Columnar file at " + path + " ends with an incomplete segment")
+            self.last_footer = pos # the previous footer of the next segment appended
+            while (pos != 0):
+                self.segments.append(Segment(self.mapped, pos))
+                pos = self.segments[-1].prev
+        except (OSError, ValueError, struct.error) as err:
+            self.close()
+            raise OSError(str(err))
+        self.segments.reverse()
+        self.starts = [] # index of the first row of each segment
+        self.count = 0
+        self.total = 0
+        self.hist = [0] * HIST_SLOTS
+        for segment in self.segments:
+            self.starts.append(self.count)
+            self.count += segment.count
+            self.total += segment.total
+            self.hist = list(map(int.__add__, self.hist, segment.hist))
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        for segment in self.segments:
+            segment.release()
+        try:
+            self.mapped.close()
+        except BufferError:
+            pass # views are still held elsewhere; the mapping is unmapped when they are freed
+        self.filein.close()
+
+    def sources(self):
+        """Returns the source descriptions (url, size, mtime_ns) of every segment in order."""
+        return [source for segment in self.segments for source in segment.sources]
+
+    def age_columns(self):
+        """Returns the age column of every segment as a memoryview of the mapping (typecode 'B' or 'H'), without copying."""
+        return [segment.ages for segment in self.segments]
+
+    def name(self, row):
+        """Decodes the name ("lname, fname" like the records of stream_reader) of a row."""
+        i = bisect_right(self.starts, row) - 1
+        segment = self.segments[i]
+        row -= self.starts[i]
+        start = segment.names_start
+        return self.mapped[start + segment.offsets[row]:start + segment.offsets[row + 1]].decode("utf-8")
+
+    def first_row(self, age):
+        """Returns the index of the first row with the provided age, or None if there is none."""
+        for start, segment in zip(self.starts, self.segments):
+            if (segment.firsts[age] >= 0):
+                return start + segment.firsts[age]
+        return None
+
+    def summary(self):
+        """Returns (cumulative age, rows, age histogram, first name of each age) from the footers alone, in the shape of hist_median.summarize_records."""
+        names = [None] * HIST_SLOTS
+        for age in range(HIST_SLOTS):
+            if (self.hist[age] > 0):
+                names[age] = self.name(self.first_row(age))
+
+        return self.total, self.count, list(self.hist), names
+
+    def records(self, rows=False):
+        """Yields an (age, name) tuple for every row, or an (age, row index) tuple with rows, like stream_reader.stream_records."""
+        for start, segment in zip(self.starts, self.segments):
+            if (rows):
+                yield from zip(segment.ages, range(start, start + segment.count))
+                continue
+            names_start = segment.names_start
+            offsets = segment.offsets
+            for row in range(segment.count):
+                yield segment.ages[row], self.mapped[names_start + offsets[row]:names_start + offsets[row + 1]].decode("utf-8")
@@ -0,0 +1,130 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        Transparent decompression of gzip, bz2 and xz inputs. The format is detected from the magic bytes at the start of the data rather than the file name, and the data is inflated as a stream of bounded chunks, optionally in a background thread so decompression overlaps parsing, so compressed csv files feed the same header and line processing as plain ones without being decompressed to disk first.
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import zlib
+
+import url_io
+
+MAGIC = ((b"\x1f\x8b", "gzip"), (b"BZh", "bz2"), (b"\xfd7zXZ\x00", "xz"))
+DECOMPRESSORS = {"gzip": lambda: zlib.decompressobj(16 + zlib.MAX_WBITS), "bz2": bz2.BZ2Decompressor, "xz": lzma.LZMADecompressor}
+FILE_TYPES = {"gzip": gzip.GzipFile, "bz2": bz2.BZ2File, "xz": lzma.LZMAFile}
+HEAD_SIZE = 8 # leading bytes gathered to recognize the format of a stream (the longest magic is the 8 bytes of columnar.MAGIC)
+THREADED = (os.cpu_count() or 1) > 1 # decompress in a background thread; zlib, bz2 and lzma release the GIL while inflating, but on a single CPU the handoff only adds overhead
+
+
+def detect(head):
+    """Returns the compression format ("gzip", "bz2" or "xz") whose magic bytes start head, or None for uncompressed data."""
+    for magic, kind in MAGIC:
+        if (head.startswith(magic)):
+            return kind
+    return None
+
+def is_compressed(url):
+    """Returns True if the data of the provided url is compressed. Unreadable urls are reported as uncompressed so the error surfaces where they are read."""
+    try:
+        with url_io.open_url(url) as filein:
+            return detect(filein.read(6)) != None
+    except OSError:
+        return False
+
+def decompress(chunks, bufsize, threaded=None):
+    """
+    Passes a stream of byte chunks through unchanged if it is uncompressed (its first chunk then holds at least HEAD_SIZE bytes, unless the stream is shorter), or yields its decompressed contents in chunks of at most bufsize bytes if it starts with the magic bytes of a supported format. Concatenated streams (multi-member gzip files, for instance) are decompressed one after the other. With threaded (THREADED by default) decompression runs in a background thread that stays at most url_io.QUEUE_CHUNKS chunks ahead. Raises OSError if the data ends in the middle of a compressed stream.
+    """
+    chunks = iter(chunks)
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if (len(head) >= HEAD_SIZE):
+            break
+    kind = detect(head)
+    if (kind == None):
+        if (head):
+            yield head
+        yield from chunks
+        return
+
+    inflated = inflate(chunks, head, kind, bufsize)
+    if (THREADED if threaded == None else threaded):
+        inflated = url_io.in_background(inflated)[0]
+    yield from inflated
+
+def inflate(chunks, head, kind, bufsize):
+    """Decompresses head followed by the rest of chunks, yielding at most bufsize bytes at a time so a highly compressed chunk does not expand in one piece."""
+    decomp = DECOMPRESSORS[kind]()
+    pending = False # part of a compressed stream has been consumed but not its end
+    for chunk in prepend(head, chunks):
+        while (chunk or (kind != "gzip" and not decomp.needs_input)):
+            pending = True
+            data = decomp.decompress(chunk, bufsize)
+            if (data):
+                yield data
+            if (decomp.eof): # the next stream, if any, starts in the unused data
+                chunk = decomp.unused_data
+                decomp = DECOMPRESSORS[kind]()
+                pending = False
+            else:
+                chunk = decomp.unconsumed_tail if kind == "gzip" else b""
+    if (pending and kind == "gzip"):
+        data = decomp.flush()
+        if (data):
+            yield data
+    if (pending and not decomp.eof):
+        raise OSError("Compressed (" + kind + ") data ended before the end of the stream")
+
+def prepend(head, chunks):
+    """Yields head followed by the remaining chunks."""
+    yield head
+    yield from chunks
+
+def open_input(url, start=0):
+    """
+    Opens url (see url_io.open_url) for binary reading of its decompressed contents from byte start. Compressed data is read through the gzip, bz2 or lzma file classes, which reach start by decompressing up to it; uncompressed data is read from start directly.
+    """
+    filein = url_io.open_url(url)
+    try:
+        kind = detect(filein.peek(6)[:6])
+    except Exception:
+        filein.close()
+        raise
+    if (kind == None):
+        if (start > 0):
+            filein.close()
+            return url_io.open_url(url, start)
+        return filein
+
+    inflated = FILE_TYPES[kind](fileobj=filein) if kind == "gzip" else FILE_TYPES[kind](filein)
+    inflated.seek(start)
+    return ClosingFile(inflated, filein)
+
+
+class ClosingFile:
+    """A decompressed file that also closes the raw file underneath it."""
+
+    def __init__(self, inflated, raw):
+        self.inflated = inflated
+        self.raw = raw
+
+    def read(self, size=-1):
+        return self.inflated.read(size)
+
+    def readline(self):
+        return self.inflated.readline()
+
+    def close(self):
+        self.inflated.close()
+        self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
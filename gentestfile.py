@@ -1,28 +1,130 @@
 """
         Author: Spencer Little (mrlittle@uw.edu)
-        Last edit: 01/05/2020
-        Generates csv files in the test format (fname, lname, age).
+        Last edit: 10/18/2026
+        Generates csv files in the test format. Names are drawn from a seeded pool instead of Faker and lines are written in large blocks, so millions of rows are generated in seconds; the same seed always produces the same files, whatever the number of worker processes.
 """
 
-from faker import Faker
-from random import randint
+from functools import lru_cache, partial
+from itertools import permutations
+from math import exp
+import argparse
+import multiprocessing
+import os
+import random
 
-def gen_testfile(count, fname):
+ORDERS = tuple(", ".join(cols) for cols in permutations(("fname", "lname", "age"))) # every header column order
+AGE_DISTRIBUTIONS = ("uniform", "normal", "young", "old", "wide")
+BLOCK_ROWS = 100000 # rows formatted and written per write call
+TABLE_SIZE = 4096 # resolution of the age sampling table
+SEED = 2020
+
+SYLLABLES = ("al", "an", "ar", "be", "bri", "ca", "da", "de", "el", "em", "fa", "ga", "ha", "is", "ja", "ka", "la", "le", "li", "lo",
+    "ma", "mi", "na", "ni", "no", "ol", "pa", "ra", "ri", "ro", "sa", "se", "sha", "ta", "ti", "to", "va", "vi", "wi", "ya", "za")
+
+
+def gen_testfile(count, fname, seed=SEED):
     """
     Generates a test file with <count> lines in the test format (fname, lname, age)
     """
-    fake = Faker()
-    with open(fname, "w+") as testf:
-        testf.write('fname, lname, age\n') # filter names w/ more than two components
-        for x in range(count):
-            name = fake.name()
-            while (len(name.split(" ")) != 2):
-                name = fake.name()
-            line = ", ".join(name.split(" ")) + ", " + str(randint(1, 100)) + "\n"
-            testf.write(line)
+    write_file(fname, count, ORDERS[0], name_pool(seed), age_table("uniform", random.Random(seed)), 0, seed)
+
+def generate(out_dir, rows, files=1, order=ORDERS[0], ages="uniform", bad_rate=0, seed=SEED, workers=1):
+    """
+    Writes rows lines spread evenly over files csv files in out_dir (many files of a few rows each reproduce the many-URL layout). order is a header column order or "mixed" to rotate through every order by file; ages names an age distribution; bad_rate is the fraction of malformed lines. Files are written by a pool of worker processes, each file from its own seed, so the output only depends on the arguments. Returns the paths of the files.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    width = len(str(files - 1))
+    tasks = []
+    for i in range(files):
+        path = os.path.join(out_dir, "part" + str(i).zfill(width) + ".csv")
+        count = rows * (i + 1) // files - rows * i // files
+        tasks.append((path, count, ORDERS[i % len(ORDERS)] if order == "mixed" else order, ages, bad_rate, seed * 1000003 + i))
+    if ((workers != None and workers <= 1) or len(tasks) <= 1):
+        for task in tasks:
+            write_task(seed, task)
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            pool.map(partial(write_task, seed), tasks, max(1, len(tasks) // (4 * (workers or os.cpu_count() or 1))))
+
+    return [task[0] for task in tasks]
+
+def write_task(pool_seed, task):
+    """Writes the file described by a task tuple; the name pool is shared by every file of a dataset."""
+    path, count, order, ages, bad_rate, seed = task
+    write_file(path, count, order, name_pool(pool_seed), age_table(ages, random.Random(pool_seed)), bad_rate, seed)
+
+def write_file(path, count, order, names, table, bad_rate=0, seed=SEED):
+    """
+    Writes a header and count lines to path, BLOCK_ROWS lines at a time. Fields are drawn with one random.choices call per column per block; a bad_rate fraction of the lines, at random positions, is replaced by malformed lines.
+    """
+    rng = random.Random(seed)
+    fnames, lnames = names
+    columns = [col.strip() for col in order.split(",")]
+    with open(path, 'w', encoding="utf-8") as testf:
+        testf.write(order + "\n")
+        for start in range(0, count, BLOCK_ROWS):
+            size = min(BLOCK_ROWS, count - start)
+            fields = {"fname": rng.choices(fnames, k=size), "lname": rng.choices(lnames, k=size), "age": rng.choices(table, k=size)}
+            lines = list(map(", ".join, zip(*(fields[col] for col in columns))))
+            for i in rng.sample(range(size), round(size * bad_rate)) if bad_rate > 0 else ():
+                lines[i] = malformed(lines[i], rng)
+            testf.write("\n".join(lines) + "\n")
+
+def malformed(line, rng):
+    """Corrupts a line in one of the ways seen in file9_bad.csv: two records on one line, an empty field, a truncated line or a non-numeric age."""
+    fields = line.split(", ")
+    kind = rng.randrange(4)
+    if (kind == 0):
+        return line + ", " + line
+    elif (kind == 1):
+        fields[rng.randrange(3)] = ""
+        return ", ".join(fields)
+    elif (kind == 2):
+        return fields[0] + ", "
+    return ", ".join(field if not field.isdigit() else "unknown" for field in fields)
+
+@lru_cache(maxsize=8) # every file of a dataset draws from the same pool
+def name_pool(seed=SEED, first=2000, last=5000):
+    """Builds the seeded pools of first names (capitalized) and last names (upper case) from random syllables."""
+    rng = random.Random(seed)
+    fnames = sorted(set("".join(rng.choices(SYLLABLES, k=rng.randint(2, 3))).capitalize() for i in range(first)))
+    lnames = sorted(set("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).upper() for i in range(last)))
+    return fnames, lnames
+
+def age_table(ages, rng):
+    """
+    Returns a table of TABLE_SIZE age strings laid out by the inverse distribution function of the named distribution, so ages are sampled with a single unweighted random.choices call: uniform (1-100, like gen_testfile always did), normal (mean 45, sd 18), young and old (exponentially skewed towards 1 or 100), or wide (uniform 0-999, the full domain the parser accepts).
+    """
+    if (ages == "wide"):
+        return [str(rng.randint(0, 999)) for i in range(TABLE_SIZE)]
+    weights = {"uniform": lambda age: 1, "normal": lambda age: exp(-((age - 45) / 18) ** 2 / 2),
+        "young": lambda age: exp(-age / 20), "old": lambda age: exp(-(100 - age) / 20)}[ages]
+    total = sum(weights(age) for age in range(1, 101))
+    table = []
+    seen = 0
+    for age in range(1, 101):
+        seen += weights(age)
+        table.extend([str(age)] * (round(seen / total * TABLE_SIZE) - len(table)))
+
+    return table
+
+
 
 
 if __name__=="__main__":
-    gen_testfile(100000, "test1.csv")
-    gen_testfile(1000000, "test2.csv")
-    gen_testfile(10000000, "test3.csv")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, help="total number of rows (default: write the classic test1-3.csv files)")
+    parser.add_argument("--files", type=int, default=1, help="number of files the rows are spread over")
+    parser.add_argument("--out", default=".", help="output directory")
+    parser.add_argument("--order", default=ORDERS[0], choices=ORDERS + ("mixed",), help="header column order, or mixed to rotate through every order")
+    parser.add_argument("--ages", default="uniform", choices=AGE_DISTRIBUTIONS, help="age distribution")
+    parser.add_argument("--bad-rate", type=float, default=0, help="fraction of malformed lines")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("-j", "--workers", type=int, nargs="?", const=None, default=1, help="number of worker processes (default 1, -j alone uses the CPU count)")
+    args = parser.parse_args()
+    if (args.rows == None):
+        gen_testfile(100000, "test1.csv")
+        gen_testfile(1000000, "test2.csv")
+        gen_testfile(10000000, "test3.csv")
+    else:
+        generate(args.out, args.rows, args.files, args.order, args.ages, args.bad_rate, args.seed, args.workers)
@@ -0,0 +1,198 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        A module that reads personal data from csv files and reports the average, median and count of every group of records (by source file, last name, first name or a derived key) together with the global result, from a single ingest pass. Each group keeps a bounded-domain age histogram like hist_median.py, but only up to the oldest age seen in that group and with the narrowest counters that hold its counts, so hundreds of thousands of small groups stay compact.
+"""
+
+from array import array
+from bisect import bisect_right
+from functools import partial
+from itertools import accumulate
+from operator import add
+
+import hist_median
+import instrument
+import parallel
+import stream_reader
+import url_io
+
+AGE_SLOTS = hist_median.AGE_SLOTS
+COUNTER_TYPES = ('B', 'H', 'I', 'Q') # array typecodes a group histogram is promoted through as its counts grow
+LIMITS = {'B': 1 << 8, 'H': 1 << 16, 'I': 1 << 32, 'Q': 1 << 64}
+SPAN_STEP = 16 # group histograms grow this many ages at a time, so a group is widened a few times rather than for every new age
+
+
+def by_lname(age, lname, fname):
+    """Groups records by last name."""
+    return lname
+
+def by_fname(age, lname, fname):
+    """Groups records by first name."""
+    return fname
+
+def by_name(age, lname, fname):
+    """Groups records by full name ("lname, fname")."""
+    return lname + ", " + fname
+
+def by_initial(age, lname, fname):
+    """Groups records by the initial of the last name, an example of a derived key."""
+    return lname[:1].upper()
+
+GROUP_KEYS = {"file": None, "lname": by_lname, "fname": by_fname, "name": by_name, "initial": by_initial} # "file" groups by source URL
+
+
+@instrument.staged("select")
+def compute_groups(file_urls, key="file", bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1):
+    """
+    Ingests every URL once and groups its records by key: "file" for the source URL, one of the other names of GROUP_KEYS, or a function key(age, lname, fname) returning any hashable group (it must be picklable, such as a module level function, when workers > 1). With more than one worker (None uses every CPU) URLs are summarized in separate processes and merged in URL order. Returns (dictionary mapping each group to (average age, median age, lines processed), global (average age, (median age, name of person with median age), lines processed) as returned by hist_median.compute_stats).
+    """
+    groups, total, count, hist, names = ingest(file_urls, key, bufsize, workers)
+    avg = 0 if count == 0 else round(total/count, 2)
+    results = {group: groups.stats(group) for group in groups.hists}
+
+    return results, (avg, hist_median.get_median(hist, names, count), count)
+
+@instrument.staged("insert")
+def ingest(file_urls, key="file", bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1):
+    """Reduces every URL into the group histograms and the global histogram. Returns (GroupHistograms, cumulative age, lines processed, global age histogram, first name seen for each age)."""
+    key = GROUP_KEYS[key] if isinstance(key, str) else key
+    groups = GroupHistograms()
+    hist = [0] * AGE_SLOTS
+    names = [None] * AGE_SLOTS
+    total = 0
+    count = 0
+    if (key == None):
+        for url, summary in parallel.map_summaries(hist_median.summarize_records, file_urls, workers, bufsize, keyed=True):
+            groups.merge_hist(url, summary[2])
+            stotal, sprocessed = hist_median.merge_summary(hist, names, summary)
+            total += stotal
+            count += sprocessed
+    elif (parallel.resolve_workers(workers) > 1):
+        for summary in parallel.map_summaries(partial(summarize_groups, key), file_urls, workers, bufsize):
+            groups.merge(summary[4])
+            stotal, sprocessed = hist_median.merge_summary(hist, names, summary[:4])
+            total += stotal
+            count += sprocessed
+    else:
+        for url, chunks in url_io.prefetch(file_urls, bufsize):
+            stotal, sprocessed = add_records(stream_reader.stream_records(url, bufsize, chunks=chunks), key, groups, hist, names)
+            total += stotal
+            count += sprocessed
+
+    return groups, total, count, hist, names
+
+def add_records(records, key, groups, hist, names):
+    """
+    Counts the age of each (age, "lname, fname") record in the histogram of its group (see compute_groups for key) and in the global histogram, keeping the first name seen for each age like hist_median.add_records. Returns cumulative age of the records and the number of records.
+    """
+    total = 0
+    count = 0
+    for age, name in records:
+        lname, fname = name.split(",", 1)
+        groups.add(key(age, lname.strip(), fname.strip()), age)
+        hist[age] += 1
+        if (names[age] == None):
+            names[age] = name
+        total += age
+        count += 1
+
+    return total, count
+
+def summarize_groups(key, records):
+    """
+    Reduces a stream of records to a mergeable summary: (cumulative age, lines processed, global age histogram, first name seen for each age, GroupHistograms of the records grouped by key).
+    """
+    groups = GroupHistograms()
+    hist = [0] * AGE_SLOTS
+    names = [None] * AGE_SLOTS
+    total, count = add_records(records, key, groups, hist, names)
+    return total, count, hist, names, groups
+
+def fit_type(largest):
+    """Returns the narrowest counter typecode that holds largest."""
+    for typecode in COUNTER_TYPES:
+        if (largest < LIMITS[typecode]):
+            return typecode
+
+
+class GroupHistograms:
+    """
+    The age histograms of many groups, held in hists as a dictionary from each group (in order of first appearance) to an array counting the ages 0 to len - 1. Arrays start with one-byte counters, grow SPAN_STEP ages at a time up to the oldest age seen in their group and are promoted to wider counters once a count overflows, so a group costs about one byte per age up to its oldest rather than a full AGE_SLOTS histogram.
+    """
+
+    def __init__(self):
+        self.hists = {} # group -> array of counts by age
+
+    def __len__(self):
+        return len(self.hists)
+
+    def add(self, group, age, count=1):
+        """Counts age count times in the histogram of group."""
+        hist = self.hists.get(group)
+        if (hist == None or age >= len(hist)):
+            hist = self.widen(group, age + 1)
+        try:
+            hist[age] += count
+        except OverflowError:
+            hist = self.hists[group] = array(fit_type(hist[age] + count), hist)
+            hist[age] += count
+
+    def widen(self, group, size):
+        """Extends the histogram of group, creating it if needed, to count at least size ages, rounded up to a multiple of SPAN_STEP. Returns the histogram."""
+        hist = self.hists.get(group)
+        if (hist == None):
+            hist = self.hists[group] = array('B')
+        size += -size % SPAN_STEP
+        if (size > len(hist)):
+            hist.extend(array(hist.typecode, [0]) * (size - len(hist)))
+        return hist
+
+    def merge_hist(self, group, counts):
+        """Adds a histogram counting the ages 0 to len(counts) - 1 into the histogram of group. Trailing zero counts are ignored, and an all-zero histogram adds nothing."""
+        size = len(counts) - next((i for i, c in enumerate(reversed(counts)) if c != 0), len(counts))
+        if (size == 0):
+            return
+        hist = self.widen(group, size)
+        merged = list(map(add, hist[:size], counts[:size]))
+        typecode = fit_type(max(merged))
+        if (COUNTER_TYPES.index(typecode) > COUNTER_TYPES.index(hist.typecode)):
+            hist = self.hists[group] = array(typecode, hist)
+        hist[:size] = array(hist.typecode, merged)
+
+    def merge(self, other):
+        """Adds every group histogram of another GroupHistograms into these, keeping the order of first appearance."""
+        if (len(self) == 0):
+            self.hists = dict(other.hists)
+            return
+        for group, counts in other.hists.items():
+            self.merge_hist(group, counts)
+
+    def stats(self, group):
+        """Returns (average age, median age, lines counted) of group; the median of an even count is the mean of its two middle ages."""
+        ranks = list(accumulate(self.hists[group])) # ranks[age] = lines with an age up to age
+        count = ranks[-1]
+        total = count * len(ranks) - sum(ranks) # a line of age a is missing from the a ranks below it
+        lower = bisect_right(ranks, (count - 1) // 2)
+        upper = lower if count % 2 == 1 else bisect_right(ranks, count // 2)
+
+        return round(total/count, 2), lower if lower == upper else (lower + upper) / 2, count
+
+
+
+
+if __name__=='__main__':
+    parser = parallel.build_arg_parser()
+    parser.add_argument("--group-by", default="file", choices=sorted(GROUP_KEYS), help="group records by source file, last name, first name, full name or last name initial (default file)")
+    args = parser.parse_args()
+    instrument.setup(args)
+    results, (avg, med, procd) = compute_groups(args.urls, args.group_by, workers=args.workers)
+    print("-"*30, "\nGroups (" + args.group_by + "):\n")
+    for group in (results if args.group_by == "file" else sorted(results)):
+        gavg, gmed, gprocd = results[group]
+        print(group, ": average age", gavg, "yrs, median age", gmed, "yrs,", gprocd, "lines")
+    print("-"*30, "\nResults:\n")
+    print("Average age:", avg, "yrs")
+    print("Median age:", med[0], "yrs")
+    print("Median entity:", med[1])
+    print("Processed:", procd, "lines")
+    instrument.write_report(args.report)
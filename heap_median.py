@@ -1,157 +1,244 @@
 """
         Author: Spencer Little (mrlittle@uw.edu)
-        Last edit: 01/06/2020
+        Last edit: 10/18/2026
         A module that reads personal data from csv files and reports median and average statistics using the min/max heap algorithm.
 """
 
-from heapq import heappop, heappush
-import re
-import sys
+from collections import deque
+from heapq import heappop, heappush, nsmallest
 
+import checkpoint
+import instrument
+import order_stats
+import parallel
+import record_store
+import stream_reader
+import url_io
 
-def compute_stats(file_urls):
+ROW_BITS = 40 # heap keys pack an age with a row index below 2**ROW_BITS into one int
+ROW_MASK = (1 << ROW_BITS) - 1
+
+
+@instrument.staged("select")
+def compute_stats(file_urls, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1, checkpoint=None):
     """
-    Facillitates the processing of each URL passed by the user. Returns: average age, (median age, name of person with median age), total lines processed).
+    Facillitates the processing of each URL passed by the user. With more than one worker (None uses every CPU) URLs (or byte ranges of large URLs) are parsed in separate processes and their rows are inserted into the heaps in URL order. With a checkpoint (a checkpoint.Checkpoint of kind "rows") the rows are saved periodically and the run continues from the checkpoint it was resumed from. Returns: average age, (median age, name of person with median age), total lines processed).
     """
-    min_heap = []
-    max_heap = []
-    lines_procd = 0
-    clm_age = 0
-    for url in file_urls:
-        total, processed = process_file(url, min_heap, max_heap)
-        clm_age += total
-        lines_procd += processed
-    avg = 0 if lines_procd == 0 else round(clm_age/lines_procd, 2)
-
-    return avg, get_median(min_heap, max_heap), lines_procd
+    store, min_heap, max_heap = ingest(file_urls, bufsize, workers, checkpoint)
+    avg = 0 if len(store) == 0 else round(store.total_age/len(store), 2)
 
+    return avg, get_median(min_heap, max_heap, store.name), len(store)
 
-def process_file(url, min_heap, max_heap):
+@instrument.staged("select")
+def quantiles(file_urls, qs=order_stats.DEFAULT_QUANTILES, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1, checkpoint=None):
+    """
+    Computes every quantile in qs from a single ingest of the URLs into the median heaps. The lower half holds the smallest ranks in its max heap and the upper half the rest in its min heap, so each half is popped in order only as deep as the furthest rank requested from it. Returns a list of (quantile, age, name of person with that age) in the order of qs.
     """
-    Reads all lines from the provided url and passes the resulting list to process_lines for further processing.
+    store, min_heap, max_heap = ingest(file_urls, bufsize, workers, checkpoint)
+    if (len(store) == 0):
+        return order_stats.no_data(qs)
+    positions = order_stats.quantile_positions(len(store), qs)
+    ranks = order_stats.needed_ranks(positions)
+    split = len(max_heap)
+    lower = nsmallest(split - ranks[0], max_heap) if ranks[0] < split else []
+    upper = nsmallest(ranks[-1] - split + 1, min_heap) if ranks[-1] >= split else []
+    items = {}
+    for rank in ranks:
+        age, row = split_key(lower[split - 1 - rank] if rank < split else upper[rank - split])
+        items[rank] = (age, store.name(row))
+
+    return order_stats.quantile_results(qs, positions, items)
+
+@instrument.staged("insert")
+def ingest(file_urls, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1, checkpoint=None):
     """
-    lines = []
-    try:
-        with open(url, 'r') as filein:
-            lines = filein.readlines()
-    except FileNotFoundError:
-        print("Unable to find url", url, ". Skipping...")
-        return (0, 0)
-    except OSError as err:
-        print("System error while reading file: ", err)
-    except:
-        print("Unknown error:", sys.exc_info()[1])
+    Inserts the rows of every URL into a pair of median heaps. Heap entries are single int keys packing each age with the row index of its record in a RecordStore instead of its name (see split_key). With a checkpoint, or more than one worker, the rows are loaded first (see record_store.load) and inserted in row order afterwards, which builds the same heaps, so only the rows need to be checkpointed. Returns (record store, min heap, max heap).
+    """
+    min_heap = []
+    max_heap = []
+    if (checkpoint != None or parallel.resolve_workers(workers) > 1):
+        store = record_store.load(file_urls, bufsize, workers, checkpoint)
+        for row in range(len(store)):
+            insert_age(min_heap, max_heap, store.ages[row], row)
+    else:
+        store = record_store.RecordStore()
+        for url, chunks in url_io.prefetch(file_urls, bufsize):
+            process_file(url, min_heap, max_heap, store, bufsize, chunks)
+
+    return store, min_heap, max_heap
 
-    return process_lines(url, lines, min_heap, max_heap)
 
-def process_lines(url, lines, min_heap, max_heap):
+def process_file(url, min_heap, max_heap, store, bufsize=stream_reader.DEFAULT_BUFSIZE, chunks=None):
     """
-    Reads each line in the lines list, checks input format, then inserts
-    a new age-name pair into the set of median heaps if the format is valid. Returns cumulative age of every entry in lines and the number of lines processed.
+    Streams the rows of the provided url (or of its prefetched chunks) into the record store and inserts each age with its row index into the set of median heaps. Returns cumulative age of every record and the number of lines processed.
     """
-    form = process_head(lines[0].strip("\n"))
-    if (form == None):
-        print("File at", url, " improperly formatted. Skipping...\n")
-        return 0, 0
-    lformat = build_regex(form)
-    line_num = 1 # already processed line 1
     lines_procd = 0
     total_age = 0
-    while (line_num < len(lines)):
-        line = lines[line_num]
-        if (re.search(lformat, line) == None):
-            print("Inproperly formatted input in url, ", url, ", at line ", line_num + 1, ": \n", line)
-            line_num += 1
-            continue
-        udata = line.split(",")
-        age = int(udata[form["age"]])
-        name = udata[form["lname"]].strip("\n") + ", " + udata[form["fname"]].strip("\n")
-        insert_age(min_heap, max_heap, age, name)
-        line_num += 1
+    for age, row in store.stream(url, bufsize, chunks):
+        insert_age(min_heap, max_heap, age, row)
         lines_procd += 1
         total_age += age
 
     return total_age, lines_procd
 
-def build_regex(form):
-    """Constructs a regex for validation of lines based on the form provided."""
-    reg = r"(?i)^"
-    for i in range(3):
-        elem = list(form.keys())[list(form.values()).index(i)]
-        if (elem != "age"):
-            reg += r"( ?\w{2,20})"
-        else:
-            reg += r"( ?\d{1,3})"
-        if (i < 2):
-            reg += "\,"
-
-    return reg + "$"
-
-def process_head(header):
-    """
-    Processes the first line of the provided CSV file and returns a dictionary corresponding the order of the lname, fname, and age parameters.
-    """
-    fdict = {}
-    hformat = r"(?i)^( ?\w{2,20}\,){2} ?\w{2,20}$"
-    if (re.search(hformat, header) == None):
-        return None
-    params = [p.strip(" ") for p in header.split(",")]
-    try:
-        fdict.update({"age" : params.index("age")})
-        fdict.update({"fname" : params.index("fname")})
-        fdict.update({"lname" : params.index("lname")})
-    except ValueError:
-        return None
-
-    return fdict
-
-def insert_age(min_heap, max_heap, age, name):
-    """Inserts a new age-name pair into the set of min/max heaps."""
-    lmax = age+1 if len(max_heap) == 0 else abs(max_heap[0][0])
-    if (age<=lmax):
-        heappush(max_heap, (0-age, name)) # negate ages for max heap
+def insert_age(min_heap, max_heap, age, row):
+    """Inserts an age and the row index of its record into the set of min/max heaps, packed into a single int key (see split_key)."""
+    if (len(max_heap) == 0 or age <= -(max_heap[0] >> ROW_BITS)):
+        heappush(max_heap, (-age << ROW_BITS) | row) # negate ages for max heap
     else:
-        heappush(min_heap, (age, name))
+        heappush(min_heap, (age << ROW_BITS) | row)
 
     balance_heaps(min_heap, max_heap)
 
+def split_key(key):
+    """Returns (age, row index) of a heap key. Min heap keys are age << ROW_BITS | row and max heap keys -age << ROW_BITS | row, so both order by age, then by row."""
+    return abs(key >> ROW_BITS), key & ROW_MASK
+
 def balance_heaps(min_heap, max_heap):
     """
     Balances two ordered heaps by moving the root of the max heap to the min heap (or vice versa) if necessary.
     """
     if (len(min_heap) - len(max_heap) >= 2):
-        shift = heappop(min_heap)
-        heappush(max_heap, (0 - shift[0], shift[1]))
+        age, row = split_key(heappop(min_heap))
+        heappush(max_heap, (-age << ROW_BITS) | row)
     elif (len(max_heap) - len(min_heap) >= 2):
-        shift = heappop(max_heap)
-        heappush(min_heap, (abs(shift[0]), shift[1]))
+        age, row = split_key(heappop(max_heap))
+        heappush(min_heap, (age << ROW_BITS) | row)
 
-def get_median(min_heap, max_heap):
-    """Retrieves the median from a pair of balanced, ordered min/max heaps."""
+def get_median(min_heap, max_heap, name):
+    """
+    Retrieves the median from a pair of balanced, ordered min/max heaps. name maps the row index of a heap key to the name of its record.
+    """
     if (len(min_heap) == 0 and len(max_heap) == 0):
-        med = (0, "Median does not exist, no data processed.")
-    elif (len(min_heap) > len(max_heap)):
-        med = min_heap[0]
-    elif (len(min_heap) < len(max_heap)):
-        med = (abs(max_heap[0][0]), max_heap[0][1])
-    elif (abs(max_heap[0][0]) == min_heap[0][0]):
+        return (0, "Median does not exist, no data processed.")
+    if (len(min_heap) > len(max_heap)):
+        high, row = split_key(min_heap[0])
+        return (high, name(row))
+    low, low_row = split_key(max_heap[0])
+    if (len(min_heap) < len(max_heap)):
+        return (low, name(low_row))
+    high, high_row = split_key(min_heap[0])
+    if (low == high):
         # if even count, average will only be in set if roots are equal
-        med = min_heap[0]
-    else:
-        med_avg = (min_heap[0][0] + abs(max_heap[0][0])) / 2
-        med_dne = "No entity exist in the provided list with the median age, outcome was between " + max_heap[0][1] + " at "  + str(max_heap[0][0]) + " years and " + min_heap[0][1] + " at " + str(min_heap[0][0]) + " years."
-        med = (med_avg, med_dne)
+        return (high, name(high_row))
 
-    return med
+    med_dne = "No entity exist in the provided list with the median age, outcome was between " + name(low_row) + " at "  + str(low) + " years and " + name(high_row) + " at " + str(high) + " years."
+    return ((low + high) / 2, med_dne)
+
+def window_medians(file_urls, window, step=None, bufsize=stream_reader.DEFAULT_BUFSIZE):
+    """
+    Slides a window of the last <window> records over the concatenated records of every URL and yields (records read, median of the window) after every <step> records (default: once per window).
+    """
+    step = window if step == None else step
+    heaps = WindowedMedian()
+    handles = deque()
+    seen = 0
+    for url, chunks in url_io.prefetch(file_urls, bufsize):
+        for age, name in stream_reader.stream_records(url, bufsize, chunks=chunks):
+            handles.append(heaps.insert(age, name))
+            if (len(handles) > window):
+                heaps.remove(handles.popleft())
+            seen += 1
+            if (seen % step == 0):
+                yield seen, heaps.median()
+
+
+class WindowedMedian:
+    """
+    A pair of min/max heaps that also supports removing records. Every record is stored as (age, sequence number, name) so records are totally ordered; removed records are tombstoned by sequence number and only popped once they reach the root of their heap (lazy deletion). Insert, remove and median are O(log n) amortized.
+    """
+
+    def __init__(self):
+        self.max_heap = [] # lower half, stored as (-age, -seq, name)
+        self.min_heap = [] # upper half, stored as (age, seq, name)
+        self.max_size = 0 # live records in each heap
+        self.min_size = 0
+        self.deleted = set()
+        self.next_seq = 0
+
+    def __len__(self):
+        return self.max_size + self.min_size
+
+    def insert(self, age, name):
+        """Inserts a new age-name pair and returns the handle used to remove it later."""
+        seq = self.next_seq
+        self.next_seq += 1
+        if (self.max_size == 0 or age < -self.max_heap[0][0]): # ties go up, the new record has the largest seq
+            heappush(self.max_heap, (-age, -seq, name))
+            self.max_size += 1
+        else:
+            heappush(self.min_heap, (age, seq, name))
+            self.min_size += 1
+        self.balance()
+        return (age, seq)
+
+    def remove(self, handle):
+        """Removes the record identified by a handle returned from insert. Each handle may only be removed once."""
+        age, seq = handle
+        if (self.max_size > 0 and (age, seq) <= (-self.max_heap[0][0], -self.max_heap[0][1])):
+            self.max_size -= 1
+        else:
+            self.min_size -= 1
+        self.deleted.add(seq)
+        self.prune(self.max_heap, -1)
+        self.prune(self.min_heap, 1)
+        self.balance()
+
+    def prune(self, heap, sign):
+        """Pops tombstoned records from the root of a heap so its root is always a live record."""
+        while (len(heap) > 0 and heap[0][1] * sign in self.deleted):
+            self.deleted.remove(heappop(heap)[1] * sign)
+
+    def balance(self):
+        """Keeps the lower half equal in size to the upper half or one record larger."""
+        while (self.max_size > self.min_size + 1):
+            age, seq, name = heappop(self.max_heap)
+            heappush(self.min_heap, (-age, -seq, name))
+            self.max_size -= 1
+            self.min_size += 1
+            self.prune(self.max_heap, -1)
+        while (self.min_size > self.max_size):
+            age, seq, name = heappop(self.min_heap)
+            heappush(self.max_heap, (-age, -seq, name))
+            self.min_size -= 1
+            self.max_size += 1
+            self.prune(self.min_heap, 1)
+
+    def median(self):
+        """Retrieves the median and the name of an entity with the median age, like get_median."""
+        if (len(self) == 0):
+            return (0, "Median does not exist, no data processed.")
+        low, low_name = -self.max_heap[0][0], self.max_heap[0][2]
+        if (self.max_size > self.min_size):
+            return (low, low_name)
+        high, high_name = self.min_heap[0][0], self.min_heap[0][2]
+        if (low == high):
+            return (low, low_name)
+
+        med_dne = "No entity exist in the provided list with the median age, outcome was between " + low_name + " at " + str(low) + " years and " + high_name + " at " + str(high) + " years."
+        return ((low + high) / 2, med_dne)
 
 
 
 
 if __name__=='__main__':
-    file_urls = [url for url in sys.argv[1:]]
-    avg, med, procd = compute_stats(file_urls)
-    print("-"*30, "\nResults:\n")
-    print("Average age:", avg, "yrs")
-    print("Median age:", med[0], "yrs")
-    print("Median entity:", med[1])
-    print("Processed:", procd, "lines")
+    parser = parallel.build_arg_parser()
+    parser.add_argument("--window", type=int, help="report the median of a sliding window of this many records instead")
+    parser.add_argument("--step", type=int, help="records between sliding window reports (default: the window size)")
+    checkpoint.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.setup(args)
+    run_checkpoint = checkpoint.from_args(args, "rows")
+    if (args.window != None):
+        for seen, med in window_medians(args.urls, args.window, args.step):
+            print("Records", seen - min(seen, args.window) + 1, "-", seen, ": median age", med[0], "yrs,", med[1])
+    elif (args.quantiles != None):
+        order_stats.print_quantiles(quantiles(args.urls, args.quantiles, workers=args.workers, checkpoint=run_checkpoint))
+    else:
+        avg, med, procd = compute_stats(args.urls, workers=args.workers, checkpoint=run_checkpoint)
+        print("-"*30, "\nResults:\n")
+        print("Average age:", avg, "yrs")
+        print("Median age:", med[0], "yrs")
+        print("Median entity:", med[1])
+        print("Processed:", procd, "lines")
+    instrument.write_report(args.report)
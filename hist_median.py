@@ -0,0 +1,226 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        A module that reads personal data from csv files and reports median and average statistics using a bounded-domain age histogram (counting select).
+"""
+
+from functools import partial
+from operator import mul
+
+import checkpoint
+import instrument
+import order_stats
+import parallel
+import stream_reader
+import summary_cache
+import url_io
+
+AGE_SLOTS = 1000 # ages are validated as 1-3 digits, so every age falls in [0, 999]
+
+
+@instrument.staged("select")
+def compute_stats(file_urls, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1, cache_dir=None, checkpoint=None):
+    """
+    Facillitates the processing of each URL passed by the user. With more than one worker (None uses every CPU) each URL (or byte range of a large URL) is reduced to a histogram summary in a separate process and the summaries are merged in URL order. With a cache_dir, summaries of unchanged files are reused from the summary cache in that directory. With a checkpoint (a checkpoint.Checkpoint of kind "hist") the running histogram is saved periodically and the run continues from the checkpoint it was resumed from. Returns: average age, (median age, name of person with median age), total lines processed).
+    """
+    clm_age, lines_procd, hist, names = ingest(file_urls, bufsize, workers, cache_dir, checkpoint)
+    avg = 0 if lines_procd == 0 else round(clm_age/lines_procd, 2)
+
+    return avg, get_median(hist, names, lines_procd), lines_procd
+
+@instrument.staged("select")
+def quantiles(file_urls, qs=order_stats.DEFAULT_QUANTILES, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1, cache_dir=None, checkpoint=None):
+    """
+    Computes every quantile in qs from a single ingest of the URLs and a single walk over the prefix sums of the histogram. Returns a list of (quantile, age, name of person with that age) in the order of qs.
+    """
+    clm_age, lines_procd, hist, names = ingest(file_urls, bufsize, workers, cache_dir, checkpoint)
+    if (lines_procd == 0):
+        return order_stats.no_data(qs)
+    positions = order_stats.quantile_positions(lines_procd, qs)
+    ages = select_ranks(hist, order_stats.needed_ranks(positions))
+
+    return order_stats.quantile_results(qs, positions, {rank : (age, names[age]) for rank, age in ages.items()})
+
+@instrument.staged("insert")
+def ingest(file_urls, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1, cache_dir=None, checkpoint=None):
+    """Reduces every URL into a single histogram. A checkpoint is ignored when summaries come from the cache. Returns (cumulative age, lines processed, age histogram, first name seen for each age)."""
+    if (checkpoint != None and cache_dir == None):
+        return resume_ingest(file_urls, checkpoint, bufsize, workers)
+    hist = [0] * AGE_SLOTS
+    names = [None] * AGE_SLOTS
+    lines_procd = 0
+    clm_age = 0
+    if (cache_dir != None):
+        summaries = summary_cache.map_cached(summarize_records, file_urls, cache_dir, workers, bufsize)
+    elif (parallel.resolve_workers(workers) > 1):
+        summaries = parallel.map_summaries(summarize_records, file_urls, workers, bufsize)
+    else:
+        summaries = None
+    if (summaries != None):
+        for summary in summaries:
+            total, processed = merge_summary(hist, names, summary)
+            clm_age += total
+            lines_procd += processed
+    else:
+        for url, chunks in url_io.prefetch(file_urls, bufsize):
+            total, processed = process_file(url, hist, names, bufsize, chunks)
+            clm_age += total
+            lines_procd += processed
+
+    return clm_age, lines_procd, hist, names
+
+def resume_ingest(file_urls, checkpoint, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1):
+    """
+    Like ingest, starting from the histogram and position of the checkpoint resumed from (if any) and reporting the position reached to it after every block of lines (after every summary with more than one worker) so it is saved periodically. The checkpoint is removed once every URL is done.
+    """
+    done, start, line_num = checkpoint.position()
+    saved = checkpoint.restore()
+    hist, names = ([0] * AGE_SLOTS, [None] * AGE_SLOTS) if saved == None else saved[2]
+    checkpoint.track(lambda: totals(hist) + ((hist, names),))
+    if (parallel.resolve_workers(workers) > 1):
+        for done, summary in enumerate(parallel.map_summaries(summarize_records, file_urls, workers, bufsize, skip=done), done + 1):
+            merge_summary(hist, names, summary)
+            checkpoint.advance(done)
+    else:
+        for done, (url, chunks) in enumerate(url_io.prefetch(list(file_urls)[done:], bufsize), done):
+            process_file(url, hist, names, bufsize, chunks, start, line_num, partial(checkpoint.advance, done))
+            start, line_num = 0, 1
+            checkpoint.advance(done + 1)
+    checkpoint.finish()
+
+    return totals(hist) + (hist, names)
+
+def totals(hist):
+    """Returns (cumulative age, number of entries) of an age histogram."""
+    return sum(map(mul, range(len(hist)), hist)), sum(hist)
+
+
+def process_file(url, hist, names, bufsize=stream_reader.DEFAULT_BUFSIZE, chunks=None, start=0, line_num=1, progress=None):
+    """
+    Streams the rows of the provided url (or of its prefetched chunks, from the resume position start and line_num with progress reported to progress, see stream_reader.stream_records) and counts each age in the histogram. Names are only decoded, once the file is done, for the ages it names first. A columnar file is merged from the summary of its footers without reading its rows. Returns cumulative age of every record and the number of lines processed.
+    """
+    summaries = []
+    total, processed = add_rows(stream_reader.stream_records(url, bufsize, True, chunks, lambda table: summaries.append(table.summary()), start, line_num, progress), hist, names)
+    name_rows(url, names)
+    for summary in summaries:
+        stotal, sprocessed = merge_summary(hist, names, summary)
+        total += stotal
+        processed += sprocessed
+
+    return total, processed
+
+def add_rows(rows, hist, names):
+    """
+    Counts the age of each (age, byte offset) row in the histogram. An age without a name keeps the byte offset of its first row in names until name_rows decodes it. Returns cumulative age of the rows and the number of rows.
+    """
+    before_total, before_count = totals(hist)
+    for age, offset in rows:
+        hist[age] += 1
+        if (names[age] == None):
+            names[age] = offset
+    total, count = totals(hist)
+
+    return total - before_total, count - before_count
+
+def name_rows(url, names):
+    """Replaces the byte offsets left in names by add_rows with the names of those rows of url."""
+    ages = [age for age in range(len(names)) if isinstance(names[age], int)]
+    if (len(ages) == 0):
+        return
+    for age, name in zip(ages, stream_reader.read_names(url, [names[age] for age in ages])):
+        names[age] = name
+
+def add_records(records, hist, names):
+    """
+    Counts the age of each (age, name) record in the histogram. Only the first name seen for each age is kept, so memory stays constant regardless of input size. Returns cumulative age of the records and the number of records.
+    """
+    lines_procd = 0
+    total_age = 0
+    for age, name in records:
+        hist[age] += 1
+        if (names[age] == None):
+            names[age] = name
+        lines_procd += 1
+        total_age += age
+
+    return total_age, lines_procd
+
+def summarize_records(records):
+    """
+    Reduces a stream of records to a mergeable summary: (cumulative age, lines processed, age histogram, first name seen for each age).
+    """
+    hist = [0] * AGE_SLOTS
+    names = [None] * AGE_SLOTS
+    total, processed = add_records(records, hist, names)
+    return total, processed, hist, names
+
+def merge_summary(hist, names, summary):
+    """
+    Adds a summary produced by summarize_records into the histogram and name slots. Names already present are kept, so merging summaries in URL order matches serial processing. Returns the summary's cumulative age and lines processed.
+    """
+    total, processed, shist, snames = summary
+    for age in range(AGE_SLOTS):
+        if (shist[age] != 0):
+            hist[age] += shist[age]
+            if (names[age] == None):
+                names[age] = snames[age]
+
+    return total, processed
+
+def select_rank(hist, k):
+    """Walks the prefix sums of the histogram and returns the age with (0-based) rank k."""
+    seen = 0
+    for age in range(len(hist)):
+        seen += hist[age]
+        if (seen > k):
+            return age
+
+    return None
+
+def select_ranks(hist, ranks):
+    """Walks the prefix sums of the histogram once and returns a dictionary mapping each of the ascending (0-based) ranks to its age."""
+    ages = {}
+    seen = 0
+    i = 0
+    for age in range(len(hist)):
+        seen += hist[age]
+        while (i < len(ranks) and ranks[i] < seen):
+            ages[ranks[i]] = age
+            i += 1
+
+    return ages
+
+def get_median(hist, names, count):
+    """
+    Retrieves the median and the name of an entity with the median age from an age histogram holding count entries.
+    """
+    if (count == 0):
+        return (0, "Median does not exist, no data processed.")
+    low = select_rank(hist, (count - 1) // 2)
+    high = low if count % 2 == 1 else select_rank(hist, count // 2)
+    if (low == high):
+        return (low, names[low])
+
+    med_dne = "No entity exist in the provided list with the median age, outcome was between " + names[low] + " at " + str(low) + " years and " + names[high] + " at " + str(high) + " years."
+    return ((low + high) / 2, med_dne)
+
+
+
+
+if __name__=='__main__':
+    parser = parallel.build_arg_parser()
+    parser.add_argument("--cache-dir", help="directory of the persistent per-file summary cache")
+    checkpoint.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.setup(args)
+    run_checkpoint = checkpoint.from_args(args, "hist")
+    if (args.quantiles != None):
+        order_stats.print_quantiles(quantiles(args.urls, args.quantiles, workers=args.workers, cache_dir=args.cache_dir, checkpoint=run_checkpoint))
+    else:
+        avg, med, procd = compute_stats(args.urls, workers=args.workers, cache_dir=args.cache_dir, checkpoint=run_checkpoint)
+        print("-"*30, "\nResults:\n")
+        print("Average age:", avg, "yrs")
+        print("Median age:", med[0], "yrs")
+        print("Median entity:", med[1])
+        print("Processed:", procd, "lines")
+    instrument.write_report(args.report)
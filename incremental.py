@@ -0,0 +1,168 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        Incremental processing of append-only csv files. For every URL the byte offset and header column map last consumed are recorded together with the running histogram summary, so later runs only parse newly appended lines. Truncated, replaced or rotated files (including ones truncated and grown back past the recorded offset) are detected and re-read from the start.
+"""
+
+from hashlib import blake2b
+import argparse
+import json
+import os
+
+import compressed_io
+import hist_median
+import instrument
+import stream_reader
+
+FINGERPRINT_SIZE = 4096 # bytes hashed at the start of a file and just before its consumed offset to detect a file that was replaced rather than appended to
+
+
+def compute_stats(file_urls, state_path, bufsize=stream_reader.DEFAULT_BUFSIZE):
+    """
+    Processes only the bytes appended to each URL since the state in state_path was saved, then saves the updated state. Returns the same result as a full hist_median run: average age, (median age, name of person with median age), total lines processed).
+    """
+    states = load_state(state_path)
+    hist = [0] * hist_median.AGE_SLOTS
+    names = [None] * hist_median.AGE_SLOTS
+    lines_procd = 0
+    clm_age = 0
+    for url in file_urls:
+        summary = update_file(url, states, bufsize)
+        instrument.end_url(url)
+        if (summary != None):
+            total, processed = hist_median.merge_summary(hist, names, summary)
+            clm_age += total
+            lines_procd += processed
+    save_state(state_path, states)
+    avg = 0 if lines_procd == 0 else round(clm_age/lines_procd, 2)
+
+    return avg, hist_median.get_median(hist, names, lines_procd), lines_procd
+
+def update_file(url, states, bufsize=stream_reader.DEFAULT_BUFSIZE):
+    """
+    Brings the state of a single url up to date and returns its summary (cumulative age, lines processed, age histogram, first name seen for each age). Only complete lines are committed to the state; an unterminated last line (an append in progress) is included in the returned summary but parsed again on the next run. Compressed files cannot be resumed at a byte offset, so they are read in full on every run and keep no state. Returns None if the url cannot be read or is improperly formatted.
+    """
+    path = os.path.abspath(url)
+    state = states.pop(path, None)
+    try:
+        with open(url, 'rb') as filein:
+            if (compressed_io.detect(filein.peek(6)[:6]) != None):
+                return hist_median.summarize_records(stream_reader.stream_records(url, bufsize))
+            if (state != None and not is_same_file(filein, state, os.fstat(filein.fileno()))):
+                print("File at", url, " was truncated or replaced. Re-reading from the start...")
+                state = None
+            if (state == None):
+                state = new_state(url, filein)
+                if (state == None):
+                    return None
+            filein.seek(state["offset"])
+            tally = [0]
+            consumed = [0]
+            tail = []
+            blocks = stream_reader.count_lines(complete_blocks(stream_reader.split_blocks(stream_reader.read_chunks(filein, bufsize)), tail, consumed), tally)
+            parse = stream_reader.build_parser(state["form"])
+            appended = hist_median.summarize_records(stream_reader.parse_blocks(url, blocks, parse, state["lines"]))
+            commit(filein, state, appended, state["offset"] + consumed[0], tally[0])
+    except FileNotFoundError:
+        print("Unable to find url", url, ". Skipping...")
+        return None
+    except OSError as err:
+        print("System error while reading file: ", err)
+        return None
+    states[path] = state
+
+    summary = state["summary"]
+    if (len(tail) > 0):
+        pending = hist_median.summarize_records(stream_reader.parse_blocks(url, tail, parse, state["lines"]))
+        hist, names = list(summary[2]), list(summary[3])
+        total, processed = hist_median.merge_summary(hist, names, pending)
+        summary = [summary[0] + total, summary[1] + processed, hist, names]
+
+    return summary
+
+def new_state(url, filein):
+    """
+    Reads the header line of a file and returns a fresh state positioned after it, or None if the header is improperly formatted or incomplete.
+    """
+    filein.seek(0)
+    header = filein.readline()
+    form = stream_reader.process_head(stream_reader.decode_line(header.rstrip(b"\n")))
+    if (form == None or not header.endswith(b"\n")):
+        print("File at", url, " improperly formatted. Skipping...\n")
+        return None
+
+    return {"offset": len(header), "lines": 1, "form": form, "fingerprint": None, "tail": None, "device": None, "inode": None,
+        "summary": [0, 0, [0] * hist_median.AGE_SLOTS, [None] * hist_median.AGE_SLOTS]}
+
+def complete_blocks(blocks, tail, consumed):
+    """
+    Passes through the blocks that end with a newline, adding their size to consumed[0], and collects an unterminated last block in tail.
+    """
+    for block in blocks:
+        if (block.endswith(b"\n")):
+            consumed[0] += len(block)
+            yield block
+        else:
+            tail.append(block)
+
+def commit(filein, state, appended, offset, lines):
+    """Merges the summary of newly consumed lines into the state and advances it to offset."""
+    summary = state["summary"]
+    total, processed = hist_median.merge_summary(summary[2], summary[3], appended)
+    summary[0] += total
+    summary[1] += processed
+    state["lines"] += lines
+    if (state["fingerprint"] == None or state["offset"] < FINGERPRINT_SIZE):
+        state["fingerprint"] = fingerprint(filein, 0, min(offset, FINGERPRINT_SIZE))
+    state["tail"] = fingerprint(filein, max(0, offset - FINGERPRINT_SIZE), offset)
+    info = os.fstat(filein.fileno())
+    state["device"], state["inode"] = info.st_dev, info.st_ino
+    state["offset"] = offset
+
+def is_same_file(filein, state, info):
+    """
+    Checks that a file (with os.stat result info) still holds everything consumed so far, i.e. it was only appended to: it is the same inode on the same device (not a rotated or replaced file), it is no shorter than the consumed offset, and both the first bytes and the bytes just before that offset hash as they did, which catches a file truncated and grown back past the offset. States saved before the inode and tail were recorded never match, so their files are read again once.
+    """
+    offset = state["offset"]
+    if ((info.st_dev, info.st_ino) != (state.get("device"), state.get("inode")) or info.st_size < offset):
+        return False
+
+    return fingerprint(filein, 0, min(offset, FINGERPRINT_SIZE)) == state["fingerprint"] and fingerprint(filein, max(0, offset - FINGERPRINT_SIZE), offset) == state.get("tail")
+
+def fingerprint(filein, start, end):
+    """Hashes the bytes of a file from offset start up to end."""
+    filein.seek(start)
+    return blake2b(filein.read(end - start), digest_size=16).hexdigest()
+
+def load_state(state_path):
+    """Loads the per-URL states saved by a previous run, or an empty state if there is none."""
+    try:
+        with open(state_path, 'r') as statein:
+            return json.load(statein)
+    except FileNotFoundError:
+        return {}
+    except ValueError:
+        print("State file", state_path, " is corrupt. Starting over...")
+        return {}
+
+def save_state(state_path, states):
+    """Atomically replaces the state file with the current per-URL states."""
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, 'w') as stateout:
+        json.dump(states, stateout)
+    os.replace(tmp_path, state_path)
+
+
+
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("urls", nargs="*")
+    parser.add_argument("--state", required=True, help="file holding the offsets and running state of each url")
+    args = parser.parse_args()
+    avg, med, procd = compute_stats(args.urls, args.state)
+    print("-"*30, "\nResults:\n")
+    print("Average age:", avg, "yrs")
+    print("Median age:", med[0], "yrs")
+    print("Median entity:", med[1])
+    print("Processed:", procd, "lines")
@@ -0,0 +1,224 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        Built-in instrumentation of the median modules: timers and counters for each stage of the pipeline, rejected lines per URL, throughput and peak memory, reported as a JSON document. Malformed lines are also collected here, capped per URL and optionally sampled, and written in batches instead of one print per line. Timing is off until start is called, so an unmonitored run only pays a flag check per chunk and per block.
+
+        Stages: read (opening URLs and reading raw chunks, including waiting on url_io.prefetch), decompress, header, split (regrouping chunks into blocks of whole lines), parse (validating and parsing whole blocks), validate (locating and reporting the malformed lines of a block), insert (the engine's own work on the records), select (median and quantile extraction) and checkpoint (saving checkpoints, see checkpoint.py). Time is charged to the innermost stage only, so stage times of one thread add up to at most the wall time; reads and decompression in background threads and stages run in worker processes overlap it.
+"""
+
+from contextlib import nullcontext
+import atexit
+import functools
+import json
+import resource
+import sys
+import threading
+import time
+
+STAGES = ("read", "decompress", "header", "split", "parse", "validate", "insert", "select", "checkpoint")
+BAD_LINE_CAP = 100 # malformed lines written per URL, the rest are only counted (None writes every one)
+BAD_LINE_SAMPLE = 1.0 # fraction of the malformed lines of a URL written, until the cap is reached
+BATCH_LINES = 1000 # malformed lines buffered before they are written
+
+enabled = False # timers and counters are running
+cap = BAD_LINE_CAP
+sample = BAD_LINE_SAMPLE
+started = None # time.perf_counter() when start was called
+seconds = {}
+calls = {}
+sizes = {} # bytes produced by the iterator stages
+counters = {}
+rejected = {} # malformed lines by URL
+shown = {} # malformed lines written by URL
+noted = {} # malformed lines of each URL counted in a "not shown" note
+pending = [] # formatted malformed lines waiting for the next batch
+lock = threading.Lock() # guards the timers updated from reader threads
+local = threading.local() # stack of open stage frames of each thread
+NO_STAGE = nullcontext()
+END = object()
+
+
+def configure(bad_line_cap=BAD_LINE_CAP, bad_line_sample=BAD_LINE_SAMPLE):
+    """Sets the number of malformed lines written per URL (None for all of them) and the fraction of them sampled."""
+    global cap, sample
+    cap = bad_line_cap
+    sample = min(1.0, max(0.0, bad_line_sample))
+
+def start():
+    """Clears every timer and counter and starts timing the stages."""
+    global enabled, started
+    with lock:
+        enabled = True
+        started = time.perf_counter()
+        for name in STAGES:
+            seconds[name] = 0.0
+            calls[name] = 0
+            sizes[name] = 0
+        counters.clear()
+        rejected.clear()
+        local.stack = []
+
+def stop():
+    """Stops timing the stages; the report of the run so far stays available."""
+    global enabled
+    enabled = False
+
+def setup(args):
+    """Applies the instrumentation options of parallel.build_arg_parser, starting the timers if a report was requested."""
+    configure(args.bad_lines, args.bad_sample)
+    if (args.report != None):
+        start()
+
+def settings():
+    """Returns (cap, sample, enabled), the state a worker process needs to instrument a task like this one."""
+    return cap, sample, enabled
+
+def stage(name):
+    """Returns a context manager charging the time spent in its body to stage name. Its body must not yield."""
+    return Stage(name) if enabled else NO_STAGE
+
+def staged(name):
+    """Decorates a function so each call is timed as stage name."""
+    def decorate(func):
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return run
+    return decorate
+
+def timed(items, name):
+    """Passes an iterator through, charging the time spent producing each item (and its size, for bytes) to stage name. Returns items unchanged when timing is off."""
+    return timed_items(items, name) if enabled else items
+
+def timed_items(items, name):
+    """Yields the items of an iterator, timing each step of it as stage name."""
+    items = iter(items)
+    while True:
+        frame = enter(name)
+        try:
+            item = next(items, END)
+        except BaseException:
+            leave(frame)
+            raise
+        if (item is END):
+            leave(frame, 0)
+            return
+        leave(frame, 1, len(item))
+        yield item
+
+def enter(name):
+    """Opens a frame of stage name on the stack of the calling thread."""
+    if (not hasattr(local, "stack")):
+        local.stack = []
+    frame = [name, time.perf_counter(), 0.0] # stage, start, time spent in nested stages
+    local.stack.append(frame)
+    return frame
+
+def leave(frame, produced=1, size=0):
+    """Closes the innermost frame, charging its time less that of nested stages to its stage and the whole of it to the enclosing frame. produced is the number of calls (or items) and size the bytes to count for the stage."""
+    elapsed = time.perf_counter() - frame[1]
+    stack = local.stack
+    stack.pop()
+    if (len(stack) > 0):
+        stack[-1][2] += elapsed
+    with lock:
+        seconds[frame[0]] += elapsed - frame[2]
+        calls[frame[0]] += produced
+        sizes[frame[0]] += size
+
+def count(name, amount=1):
+    """Adds amount to the counter name while timing is on."""
+    if (enabled):
+        counters[name] = counters.get(name, 0) + amount
+
+def reject(url, line_num, text):
+    """
+    Records a malformed line of url. The line is queued for writing if the URL is under the cap and the line falls in the sample; a sample rate of r writes every (1/r)th line so the choice is reproducible. A full batch is written at once.
+    """
+    seen = rejected.get(url, 0) + 1
+    rejected[url] = seen
+    if ((cap != None and shown.get(url, 0) >= cap) or int(seen * sample) == int((seen - 1) * sample)):
+        return
+    shown[url] = shown.get(url, 0) + 1
+    pending.append("Inproperly formatted input in url,  " + str(url) + " , at line  " + str(line_num) + " : \n " + text + "\n")
+    if (len(pending) >= BATCH_LINES):
+        flush()
+
+def end_url(url):
+    """Notes how many malformed lines of url were not written since its last note, and writes the queued lines."""
+    hidden = rejected.get(url, 0) - shown.get(url, 0) - noted.get(url, 0)
+    if (hidden > 0):
+        noted[url] = noted.get(url, 0) + hidden
+        pending.append(str(hidden) + " more improperly formatted line(s) in url " + str(url) + " not shown.\n")
+    flush()
+
+def flush():
+    """Writes the queued malformed lines in a single call."""
+    if (len(pending) > 0):
+        sys.stdout.write("".join(pending))
+        pending.clear()
+
+def take():
+    """Returns the timers and counters recorded since the last start or take and clears them; worker processes hand this to merge in the parent."""
+    with lock:
+        snapshot = {"seconds": dict(seconds), "calls": dict(calls), "sizes": dict(sizes), "counters": dict(counters), "rejected": dict(rejected)}
+    start()
+    return snapshot
+
+def merge(snapshot):
+    """Adds the timers and counters of a snapshot from take into those of this process."""
+    with lock:
+        for totals, part in ((seconds, snapshot["seconds"]), (calls, snapshot["calls"]), (sizes, snapshot["sizes"]), (counters, snapshot["counters"])):
+            for name, value in part.items():
+                totals[name] = totals.get(name, 0) + value
+    for url, value in snapshot["rejected"].items():
+        rejected[url] = rejected.get(url, 0) + value
+
+def report():
+    """
+    Returns the report of the run as a dictionary: wall seconds since start, lines read and rejected, lines per second, bytes read, URLs read and failed, peak resident memory of this process and of its finished worker processes in KiB, seconds, calls and bytes of each stage and the number of rejected lines of every URL that had any.
+    """
+    wall = 0.0 if started == None else time.perf_counter() - started
+    lines = counters.get("lines", 0)
+    stages = {name: {"seconds": round(seconds.get(name, 0.0), 6), "calls": calls.get(name, 0)} for name in STAGES}
+    for name in ("read", "decompress", "split"):
+        stages[name]["bytes"] = sizes.get(name, 0)
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    scale = 1024 if sys.platform == "darwin" else 1 # ru_maxrss is in bytes on macOS, KiB elsewhere
+
+    return {"wall_seconds": round(wall, 6), "lines": lines, "rejected": sum(rejected.values()), "lines_per_sec": round(lines / wall, 1) if wall > 0 else None,
+        "bytes_read": sizes.get("read", 0), "urls": counters.get("urls", 0), "failed_urls": counters.get("failed_urls", 0),
+        "peak_rss_kib": self_rss // scale, "peak_worker_rss_kib": child_rss // scale, "stages": stages,
+        "rejected_by_url": {url: value for url, value in rejected.items() if value > 0}, "bad_line_cap": cap, "bad_line_sample": sample}
+
+def write_report(path):
+    """Writes the report as JSON to path, or to standard output for "-". Does nothing if path is None."""
+    if (path == None):
+        return
+    flush()
+    text = json.dumps(report(), indent=2) + "\n"
+    if (path == "-"):
+        sys.stdout.write(text)
+        return
+    with open(path, 'w') as out:
+        out.write(text)
+
+
+class Stage:
+    """A context manager timing its body as one stage."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.frame = enter(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        leave(self.frame)
+        return False
+
+
+atexit.register(flush)
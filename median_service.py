@@ -0,0 +1,161 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        A long-running median service. The min/max heaps from heap_median stay resident while records and files are ingested, and median, average and count queries are answered from the heap roots without reprocessing. Commands are read one per line from stdin or from clients of a local Unix socket, and every command gets a one line JSON reply.
+
+        Commands:
+            ADD fname, lname, age   insert a single record
+            FILE path               ingest a csv file in the background
+            MEDIAN | AVERAGE | COUNT | STATS
+            QUIT                    close the connection
+"""
+
+from functools import partial
+from itertools import islice
+import argparse
+import asyncio
+import contextlib
+import json
+import sys
+
+import heap_median
+import stream_reader
+
+RECORD_FORM = {"fname" : 0, "lname" : 1, "age" : 2} # column order of records sent with ADD
+BATCH_SIZE = 128 # records inserted between yields to the event loop while ingesting a file
+READ_BATCH = 4096 # records parsed by the reader thread per hand-off to the event loop
+SERVICE_BUFSIZE = 16 << 10 # small reads keep the time spent parsing each block short
+
+
+class MedianState:
+    """The resident median heaps together with the running totals needed to answer queries."""
+
+    def __init__(self):
+        self.min_heap = []
+        self.max_heap = []
+        self.names = [] # name of each record, by the row index in its heap key
+        self.total_age = 0
+        self.count = 0
+        self.pending_files = 0 # files queued with FILE and not yet fully ingested
+        self.tasks = set() # running ingest tasks, kept referenced until they finish
+        self.parse_record = stream_reader.build_parser(RECORD_FORM)
+
+    def insert(self, age, name):
+        """Inserts a single age-name pair."""
+        heap_median.insert_age(self.min_heap, self.max_heap, age, len(self.names))
+        self.names.append(name)
+        self.total_age += age
+        self.count += 1
+
+    def stats(self):
+        """Returns the current average, median, median entity and count."""
+        med = heap_median.get_median(self.min_heap, self.max_heap, self.names.__getitem__)
+        avg = 0 if self.count == 0 else round(self.total_age/self.count, 2)
+        return {"average": avg, "median": med[0], "entity": med[1], "count": self.count, "pending_files": self.pending_files}
+
+
+def handle_command(state, line):
+    """
+    Executes one command against the state and returns (reply, path of a file to ingest or None). Returns None for the reply when the client asked to quit.
+    """
+    command, _, arg = line.strip().partition(" ")
+    command = command.upper()
+    if (command == "ADD"):
+        records = state.parse_record(arg.strip())
+        if (len(records) != 1):
+            return {"error": "improperly formatted record: " + arg.strip()}, None
+        state.insert(*records[0])
+        return {"count": state.count}, None
+    elif (command == "FILE"):
+        return {"queued": arg.strip()}, arg.strip()
+    elif (command in ("MEDIAN", "AVERAGE", "COUNT", "STATS")):
+        stats = state.stats()
+        if (command == "MEDIAN"):
+            return {"median": stats["median"], "entity": stats["entity"]}, None
+        elif (command != "STATS"):
+            return {command.lower(): stats[command.lower()]}, None
+        return stats, None
+    elif (command == "QUIT"):
+        return None, None
+
+    return {"error": "unknown command: " + command}, None
+
+async def ingest_file(state, path):
+    """
+    Streams a file into the state. The file is read and parsed in a worker thread, a batch of READ_BATCH records ahead, and only the inserts run on the event loop, which yields every BATCH_SIZE records so queries from other clients are answered while the file is ingested. The caller counts the file in pending_files before starting the ingest (so a STATS sent right after FILE already sees it), and it is dropped from the count here once done.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        records = stream_reader.stream_records(path, SERVICE_BUFSIZE)
+        read = lambda: list(islice(records, READ_BATCH))
+        batch = await loop.run_in_executor(None, read)
+        while (len(batch) > 0):
+            ahead = loop.run_in_executor(None, read)
+            for start in range(0, len(batch), BATCH_SIZE):
+                for age, name in batch[start:start + BATCH_SIZE]:
+                    state.insert(age, name)
+                await asyncio.sleep(0)
+            batch = await ahead
+    finally:
+        state.pending_files -= 1
+
+def finish_ingest(state, path, task):
+    """Forgets a finished ingest task, reporting on stderr the error that ended it early, if any."""
+    state.tasks.discard(task)
+    if (not task.cancelled() and task.exception() != None):
+        print("Error while ingesting file: ", path, task.exception(), file=sys.stderr)
+
+async def serve_client(state, reader, writer):
+    """Answers the commands of one socket client until it disconnects or sends QUIT."""
+    try:
+        while True:
+            line = await reader.readline()
+            if (not line):
+                break
+            reply, path = handle_command(state, line.decode(stream_reader.ENCODING, "replace"))
+            if (reply == None):
+                break
+            if (path != None):
+                state.pending_files += 1
+                task = asyncio.get_running_loop().create_task(ingest_file(state, path))
+                state.tasks.add(task)
+                task.add_done_callback(partial(finish_ingest, state, path))
+            writer.write((json.dumps(reply) + "\n").encode(stream_reader.ENCODING))
+            await writer.drain()
+    finally:
+        writer.close()
+
+async def serve_socket(state, socket_path):
+    """Serves clients on a Unix socket until cancelled."""
+    server = await asyncio.start_unix_server(lambda reader, writer: serve_client(state, reader, writer), path=socket_path)
+    async with server:
+        await server.serve_forever()
+
+def serve_stdin(state):
+    """
+    Answers commands read from stdin, one JSON reply per line on stdout. Files are ingested before the next command is read, with any problems in them reported on stderr so stdout only carries replies.
+    """
+    for line in sys.stdin:
+        reply, path = handle_command(state, line)
+        if (reply == None):
+            break
+        if (path != None):
+            state.pending_files += 1
+            with contextlib.redirect_stdout(sys.stderr):
+                asyncio.run(ingest_file(state, path))
+        print(json.dumps(reply), flush=True)
+
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("urls", nargs="*", help="files to ingest before serving")
+    parser.add_argument("--socket", help="path of the Unix socket to serve on (default: read commands from stdin)")
+    args = parser.parse_args()
+    state = MedianState()
+    for url in args.urls:
+        state.pending_files += 1
+        asyncio.run(ingest_file(state, url))
+    if (args.socket != None):
+        asyncio.run(serve_socket(state, args.socket))
+    else:
+        serve_stdin(state)
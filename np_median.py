@@ -0,0 +1,173 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        A module that reads personal data from csv files and reports median and average statistics using NumPy: the age column of each block of lines is checked and parsed in bulk into an integer ndarray, the mean is a single reduction and the median is found with np.partition. Falls back to hist_median when NumPy is not installed.
+"""
+
+import hist_median
+import instrument
+import order_stats
+import parallel
+import record_store
+import stream_reader
+import url_io
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FIELD_LENGTHS = {"fname" : (2, 20), "lname" : (2, 20), "age" : (1, 3)} # characters allowed in each field after its optional leading space, as in stream_reader.build_regex
+if (np != None):
+    ALLOWED = np.zeros(256, dtype=bool) # bytes parse_ages takes: ASCII word characters, comma, space and newline
+    ALLOWED[np.frombuffer(b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_, \n", dtype=np.uint8)] = True
+
+
+@instrument.staged("select")
+def compute_stats(file_urls, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1):
+    """
+    Facillitates the processing of each URL passed by the user. With more than one worker (None uses every CPU) URLs (or byte ranges of large URLs) are parsed in separate processes and their rows are concatenated in URL order. Returns: average age, (median age, name of person with median age), total lines processed).
+    """
+    if (np == None):
+        return hist_median.compute_stats(file_urls, bufsize, workers)
+
+    store = load(file_urls, bufsize, workers)
+    all_ages = as_ndarray(store)
+    lines_procd = len(all_ages)
+    avg = 0 if lines_procd == 0 else round(int(all_ages.sum(dtype=np.int64))/lines_procd, 2)
+
+    return avg, get_median(all_ages, store), lines_procd
+
+@instrument.staged("select")
+def quantiles(file_urls, qs=order_stats.DEFAULT_QUANTILES, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1):
+    """
+    Computes every quantile in qs from a single ingest of the URLs and a single np.partition call on all the ranks they need. Returns a list of (quantile, age, name of person with that age) in the order of qs.
+    """
+    if (np == None):
+        return hist_median.quantiles(file_urls, qs, bufsize, workers)
+
+    store = load(file_urls, bufsize, workers)
+    all_ages = as_ndarray(store)
+    if (len(all_ages) == 0):
+        return order_stats.no_data(qs)
+    positions = order_stats.quantile_positions(len(all_ages), qs)
+    ranks = order_stats.needed_ranks(positions)
+    part = np.partition(all_ages, ranks)
+    items = {}
+    for rank in ranks:
+        age = int(part[rank])
+        items[rank] = (age, store.name(first_row(all_ages, age)))
+
+    return order_stats.quantile_results(qs, positions, items)
+
+@instrument.staged("insert")
+def load(file_urls, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1):
+    """
+    Loads the rows of every URL into a RecordStore like record_store.load, but a serial load parses each block of lines in bulk with parse_rows and copies its ages and offsets into the store at C speed. With more than one worker the rows are loaded by record_store.load.
+    """
+    if (parallel.resolve_workers(workers) > 1):
+        return record_store.load(file_urls, bufsize, workers)
+    store = record_store.RecordStore()
+    for url, chunks in url_io.prefetch(file_urls, bufsize):
+        store.begin_file(url)
+        for ages, offsets in stream_reader.stream_records(url, bufsize, parse_rows, chunks, store.add_table):
+            store.ages.frombytes(ages.tobytes())
+            store.offsets.frombytes(offsets.tobytes())
+            store.total_age += int(ages.sum(dtype=np.int64))
+
+    return store
+
+def parse_rows(url, blocks, form, offset, line_num=1):
+    """
+    Yields the (ages, byte offsets) of the properly formatted lines of each block as uint16 and uint64 ndarrays, where offset is the position of the first block in the file (see stream_reader.parse_rows). The lines parse_ages cannot take are parsed together by the pattern of stream_reader.build_row_parser, which picks out the malformed ones to be reported.
+    """
+    parse = stream_reader.build_row_parser(form)
+    for block in blocks:
+        with instrument.stage("parse"):
+            ages, good, starts, ends = parse_ages(block, form)
+        if (not good.all()):
+            with instrument.stage("validate"):
+                unsure = np.flatnonzero(~good)
+                bad = []
+                whole = len(unsure) == len(good)
+                text = stream_reader.decode_block(block if whole else b"".join([block[starts[line]:ends[line] + 1] for line in unsure]))
+                found = parse(text, bad) if whole or len(text) > 0 else [] # a lone carriage return ending the file after other lines is not a line, as in stream_reader.parse_rows
+                stream_reader.report_lines(url, [(int(unsure[index]), line) for index, line in bad], line_num, stream_reader.report_line)
+                parsed = [(line, int(age)) for line, age in zip(unsure, found) if age]
+                if (len(parsed) > 0):
+                    lines, values = zip(*parsed)
+                    ages[list(lines)] = values
+                    good[list(lines)] = True
+        instrument.count("lines", len(good))
+        yield ages[good], starts[good].astype(np.uint64) + np.uint64(offset)
+        line_num += len(good)
+        offset += len(block)
+
+def parse_ages(block, form):
+    """
+    Checks and parses every line of a block in bulk: the newlines, commas and spaces are located with np.flatnonzero and counted per line, every field is checked against FIELD_LENGTHS and the ages are read from the last three bytes of their field. Only lines of ASCII word characters, two commas and leading spaces are taken. Returns (ages, mask of the lines taken, start and end offset of each line in the block); the ages of the lines not taken are meaningless.
+    """
+    data = np.frombuffer(block if block.endswith(b"\n") else block + b"\n", dtype=np.uint8)
+    ends = np.flatnonzero(data == ord("\n"))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    positions = np.flatnonzero(data == ord(","))
+    commas = line_counts(positions, ends)
+    good = (commas == 2) & (line_counts(np.flatnonzero(~ALLOWED[data]), ends) == 0)
+    if (len(positions) < 2):
+        return np.zeros(len(ends), dtype=np.uint16), np.zeros(len(ends), dtype=bool), starts, ends
+    first = np.minimum(np.concatenate(([0], np.cumsum(commas[:-1]))), len(positions) - 2) # index of the first comma of each line
+    field_starts = np.stack((starts, positions[first] + 1, positions[first + 1] + 1), axis=1)
+    field_ends = np.stack((positions[first], positions[first + 1], ends), axis=1)
+    spaced = data[field_starts] == ord(" ")
+    good &= line_counts(np.flatnonzero(data == ord(" ")), ends) == spaced.sum(axis=1) # a space may only lead a field
+    lengths = field_ends - field_starts - spaced
+    low, high = zip(*(FIELD_LENGTHS[field] for field in sorted(form, key=form.get)))
+    good &= ((lengths >= low) & (lengths <= high)).all(axis=1)
+    age_col = form["age"]
+    digits = data[np.maximum(field_ends[:, age_col, None] - (3, 2, 1), 0)]
+    present = lengths[:, age_col, None] >= (3, 2, 1)
+    good &= ~(present & ((digits < ord("0")) | (digits > ord("9")))).any(axis=1)
+    ages = ((digits.astype(np.uint16) - ord("0")) * present * np.array((100, 10, 1), dtype=np.uint16)).sum(axis=1, dtype=np.uint16)
+
+    return ages, good, starts, ends
+
+def line_counts(positions, ends):
+    """Returns the number of the provided byte positions that fall on each line, given the offsets of the newlines ending the lines."""
+    return np.bincount(np.searchsorted(ends, positions), minlength=len(ends))
+
+def as_ndarray(store):
+    """Returns the ages of a RecordStore as a uint16 ndarray sharing the store's buffer, so no copy is made."""
+    return np.frombuffer(store.ages, dtype=np.uint16) if len(store) > 0 else np.zeros(0, dtype=np.uint16)
+
+def get_median(ages, store):
+    """
+    Computes the median with np.partition on both middle ranks, then maps the median age back to the first row holding it and decodes that row's name from the RecordStore to report the median entity.
+    """
+    if (len(ages) == 0):
+        return (0, "Median does not exist, no data processed.")
+    low_rank, high_rank = (len(ages) - 1) // 2, len(ages) // 2
+    part = np.partition(ages, [low_rank, high_rank])
+    low, high = int(part[low_rank]), int(part[high_rank])
+    if (low == high):
+        return (low, store.name(first_row(ages, low)))
+
+    med_dne = "No entity exist in the provided list with the median age, outcome was between " + store.name(first_row(ages, low)) + " at " + str(low) + " years and " + store.name(first_row(ages, high)) + " at " + str(high) + " years."
+    return ((low + high) / 2, med_dne)
+
+def first_row(ages, age):
+    """Returns the index of the first row with the provided age."""
+    return int(np.argmax(ages == age))
+
+
+if __name__=='__main__':
+    args = parallel.parse_args()
+    if (args.quantiles != None):
+        order_stats.print_quantiles(quantiles(args.urls, args.quantiles, workers=args.workers))
+    else:
+        avg, med, procd = compute_stats(args.urls, workers=args.workers)
+        print("-"*30, "\nResults:\n")
+        print("Average age:", avg, "yrs")
+        print("Median age:", med[0], "yrs")
+        print("Median entity:", med[1])
+        print("Processed:", procd, "lines")
+    instrument.write_report(args.report)
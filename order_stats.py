@@ -0,0 +1,69 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        Rank arithmetic shared by the quantiles functions of every median module. A quantile q of n values sits at position q * (n - 1) of the sorted values; when that falls between two ranks the result is interpolated, which makes the 0.5 quantile equal to the median.
+"""
+
+from math import floor
+import argparse
+
+DEFAULT_QUANTILES = (0.1, 0.5, 0.9, 0.99)
+
+
+def quantile_positions(count, qs):
+    """
+    Returns (low rank, high rank, fraction) for every quantile in qs over count values, where the quantile lies fraction of the way from the low to the high rank.
+    """
+    positions = []
+    for q in qs:
+        if (not 0 <= q <= 1):
+            raise ValueError("quantile must be between 0 and 1: " + str(q))
+        pos = q * (count - 1)
+        low = floor(pos)
+        positions.append((low, min(low + 1, count - 1) if pos > low else low, pos - low))
+
+    return positions
+
+def needed_ranks(positions):
+    """Returns the distinct ranks referenced by a list of quantile positions, in ascending order."""
+    return sorted(set(rank for low, high, frac in positions for rank in (low, high)))
+
+def quantile_results(qs, positions, items):
+    """
+    Builds the (q, age, entity) result of every quantile from items, a dictionary mapping each needed rank to the (age, name) found at that rank.
+    """
+    results = []
+    for q, (low, high, frac) in zip(qs, positions):
+        low_age, low_name = items[low]
+        high_age, high_name = items[high]
+        if (low_age == high_age):
+            results.append((q, low_age, low_name))
+        else:
+            q_dne = "No entity exist in the provided list with the " + str(q) + " quantile age, outcome was between " + low_name + " at " + str(low_age) + " years and " + high_name + " at " + str(high_age) + " years."
+            results.append((q, interpolate(low_age, high_age, frac), q_dne))
+
+    return results
+
+def interpolate(low, high, frac):
+    """Returns the value fraction frac of the way from low to high, or low itself when both are equal."""
+    return low if low == high else low + (high - low) * frac
+
+def no_data(qs):
+    """Returns the quantile results for an empty input."""
+    return [(q, 0, "Quantile does not exist, no data processed.") for q in qs]
+
+def print_quantiles(results):
+    """Prints the result of a quantiles query, one quantile per line."""
+    print("-"*30, "\nQuantiles:\n")
+    for q, age, entity in results:
+        print("Quantile", q, ":", age, "yrs,", entity)
+
+def parse_quantiles(text):
+    """Parses a comma separated list of quantiles given on the command line, e.g. "0.1,0.5,0.9"."""
+    try:
+        qs = tuple(float(q) for q in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected comma separated quantiles: " + text)
+    if (not all(0 <= q <= 1 for q in qs)):
+        raise argparse.ArgumentTypeError("quantiles must be between 0 and 1: " + text)
+    return qs
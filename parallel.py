@@ -0,0 +1,138 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        Helpers for processing a set of URLs across several worker processes. Each worker reduces one URL (or one byte range of a large URL) to a partial summary and the summaries are handed back in input order, so merging them reproduces the serial result exactly.
+"""
+
+from functools import partial
+import argparse
+import multiprocessing
+import os
+
+import compressed_io
+import instrument
+import order_stats
+import stream_reader
+import url_io
+
+SPLIT_SIZE = 64 << 20 # files at least this large are split into byte ranges across workers
+
+
+def map_summaries(reduce, file_urls, workers=None, bufsize=stream_reader.DEFAULT_BUFSIZE, split_size=SPLIT_SIZE, rows=False, keyed=False, skip=0, seeded=False):
+    """
+    Reduces the records of every url to a partial summary with reduce(records) using a pool of worker processes, and yields the summaries in the same order as file_urls. Uncompressed files of at least split_size bytes are memory-mapped and split into one byte range per worker; malformed lines found in a range are reported here with their absolute line number. workers defaults to the CPU count; with a single worker no pool is started and the URLs are read ahead by url_io.prefetch instead. With rows, reduce receives (age, byte offset) pairs instead of records (see stream_reader.stream_records); with keyed, (url, summary) pairs are yielded so the summaries of byte ranges can be attributed to their file. skip leaves out the first skip summaries (URLs with a single worker, tasks otherwise), the ones a resumed run already holds (see checkpoint.py). With seeded, reduce(records, seed=index) also receives the index of its URL or task (counting the skipped ones), so randomized summaries merged together draw independent random numbers.
+    """
+    workers = resolve_workers(workers)
+    if (workers <= 1):
+        for index, (url, chunks) in enumerate(url_io.prefetch(list(file_urls)[skip:], bufsize), skip):
+            records = stream_reader.stream_records(url, bufsize, rows, chunks)
+            summary = reduce(records, seed=index) if seeded else reduce(records)
+            yield (url, summary) if keyed else summary
+        return
+
+    tasks = plan_tasks(file_urls, workers, split_size)[skip:]
+    if (len(tasks) <= 1):
+        results = map(partial(run_task, reduce, bufsize, rows, None, seeded), enumerate(tasks, skip)) # not worth the pool startup
+        yield from report_results(tasks, results, keyed)
+        return
+
+    run = partial(run_task, reduce, bufsize, rows, instrument.settings(), seeded)
+    chunksize = max(1, len(tasks) // (workers * 4)) # amortize IPC over many small files
+    with multiprocessing.Pool(min(workers, len(tasks))) as pool:
+        yield from report_results(tasks, pool.imap(run, enumerate(tasks, skip), chunksize), keyed)
+
+def plan_tasks(file_urls, workers, split_size):
+    """
+    Builds the list of (url, form, span) tasks: span is None for a file processed whole, or a (start, end) byte range of a large file whose header was parsed into form.
+    """
+    tasks = []
+    for url in file_urls:
+        try:
+            large = not url_io.is_remote(url) and os.path.getsize(url) >= split_size and not compressed_io.is_compressed(url)
+            if (large):
+                form, spans = stream_reader.split_ranges(url, workers)
+        except (OSError, ValueError):
+            large = False # let the worker report the problem
+        if (not large):
+            tasks.append((url, None, None))
+        elif (form == None):
+            print("File at", url, " improperly formatted. Skipping...\n")
+        else:
+            tasks.extend((url, form, span) for span in spans)
+
+    return tasks
+
+def run_task(reduce, bufsize, rows, settings, seeded, job):
+    """
+    Runs a single (index, task) job inside a worker process; with seeded, reduce also receives seed=index. settings are the instrument.settings() of the parent, or None when the task runs in the parent itself. Returns (summary, malformed lines as (relative line number, text), lines read, instrumentation snapshot); the malformed lines and lines read are only filled in for byte ranges, and the snapshot (see instrument.take) only when the parent is timing the run.
+    """
+    if (settings != None):
+        instrument.configure(settings[0], settings[1])
+        if (settings[2]):
+            instrument.start()
+    index, task = job
+    result = reduce_task(partial(reduce, seed=index) if seeded else reduce, bufsize, rows, task)
+
+    return result + ((instrument.take() if settings != None and settings[2] else None),)
+
+def reduce_task(reduce, bufsize, rows, task):
+    """Reduces the records of a task. Returns (summary, malformed lines of a byte range, lines read from a byte range)."""
+    url, form, span = task
+    if (span == None):
+        return reduce(stream_reader.stream_records(url, bufsize, rows)), [], 0
+
+    bad_lines = []
+    tally = [0]
+    try:
+        records = stream_reader.stream_range(url, form, span[0], span[1], lambda url, line_num, text: bad_lines.append((line_num, text)), bufsize, tally, rows)
+        return reduce(records), bad_lines, tally[0]
+    except OSError as err:
+        print("System error while reading file: ", err)
+        return reduce([]), [], 0
+
+def report_results(tasks, results, keyed=False):
+    """
+    Reports the malformed lines of each byte range with line numbers offset by the lines of the preceding ranges of the same file, merges the instrumentation snapshots of the workers, and yields the summaries (or with keyed, (url, summary) pairs) in task order.
+    """
+    last_url = None
+    last_end = None
+    line_base = 1
+    for task, (summary, bad_lines, line_count, snapshot) in zip(tasks, results):
+        url, form, span = task
+        if (span == None or url != last_url or span[0] != last_end):
+            line_base = 1 # first range of a file starts after the header line
+        last_url = url
+        last_end = None if span == None else span[1]
+        if (snapshot != None):
+            instrument.merge(snapshot)
+        for line_num, text in bad_lines:
+            stream_reader.report_line(url, line_base + line_num, text)
+        if (len(bad_lines) > 0):
+            instrument.end_url(url)
+        line_base += line_count
+        yield (url, summary) if keyed else summary
+
+def resolve_workers(workers):
+    """Returns the number of worker processes to use, defaulting to the CPU count."""
+    if (workers == None):
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+def parse_args(argv=None):
+    """
+    Parses the command line shared by the median executables: a list of urls, an optional worker count (-j with no value uses every CPU), an optional list of quantiles and the instrumentation options, which are applied (see instrument.setup).
+    """
+    args = build_arg_parser().parse_args(argv)
+    instrument.setup(args)
+    return args
+
+def build_arg_parser():
+    """Builds the argument parser shared by the median executables, which may add options of their own. Executables parsing with it directly apply the instrumentation options with instrument.setup."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("urls", nargs="*")
+    parser.add_argument("-j", "--workers", type=int, nargs="?", const=None, default=1, help="number of worker processes (default 1, -j alone uses the CPU count)")
+    parser.add_argument("-q", "--quantiles", type=order_stats.parse_quantiles, help="report these comma separated quantiles (e.g. 0.1,0.5,0.9) instead of the median")
+    parser.add_argument("--report", metavar="FILE", help="write a JSON report of stage timings, line counts, throughput and peak memory to FILE (- for standard output)")
+    parser.add_argument("--bad-lines", type=int, default=instrument.BAD_LINE_CAP, help="malformed lines written per url, the rest are only counted (default %(default)s)")
+    parser.add_argument("--bad-sample", type=float, default=instrument.BAD_LINE_SAMPLE, help="fraction of the malformed lines of a url written, until the cap is reached (default %(default)s)")
+    return parser
@@ -0,0 +1,125 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        Converts validated csv files into the binary columnar format read by columnar.py, so later queries do not parse text again. Each run appends one segment holding the rows of the URLs not converted before; URLs already converted and unchanged are skipped, so new csv files can be added to a columnar file as they arrive.
+"""
+
+from array import array
+from collections import Counter
+from itertools import accumulate, islice
+import argparse
+import json
+import os
+
+import columnar
+import stream_reader
+import url_io
+
+BATCH_ROWS = 100000 # records encoded and written per write call
+
+
+def convert(path, file_urls, bufsize=stream_reader.DEFAULT_BUFSIZE):
+    """
+    Appends a segment holding every properly formatted record of file_urls to the columnar file at path, creating it if needed. Malformed lines and unreadable files are reported and skipped as by the median modules. URLs already converted into path are skipped if unchanged; a URL that changed since it was converted is reported and skipped, because segments cannot be rewritten. Returns (rows added, URLs converted).
+    """
+    known = {}
+    prev = 0
+    if (os.path.exists(path) and os.path.getsize(path) > 0):
+        with columnar.ColumnarFile(path) as table:
+            known = {source["url"]: source for source in table.sources()}
+            prev = table.last_footer
+    sources = []
+    for url in file_urls:
+        source = describe(url)
+        old = None if source == None else known.get(source["url"])
+        if (source == None):
+            print("Unable to find url", url, ". Skipping...")
+        elif (old == None):
+            sources.append(source)
+            known[source["url"]] = source
+        elif (old != source):
+            print("File at", url, " changed since it was converted. Skipping...")
+    if (len(sources) == 0):
+        return 0, 0
+    with open(path, 'r+b' if prev != 0 else 'w+b') as out:
+        if (prev == 0):
+            out.write(columnar.MAGIC)
+        names_start = out.seek(0, os.SEEK_END)
+        try:
+            ages, offsets = write_names(out, (source["url"] for source in sources), bufsize)
+            write_segment(out, names_start, ages, offsets, prev, sources)
+        except BaseException:
+            out.truncate(names_start) # leave the previous segments readable
+            raise
+
+    return len(ages), len(sources)
+
+def describe(url):
+    """Describes a source URL by its absolute path (or address), size and modification time, which identify the version that was converted. Returns None for a local file that does not exist."""
+    if (url_io.is_remote(url)):
+        return {"url": url, "size": None, "mtime_ns": None}
+    try:
+        info = os.stat(url)
+    except OSError:
+        return None
+
+    return {"url": os.path.abspath(url), "size": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+def write_names(out, file_urls, bufsize=stream_reader.DEFAULT_BUFSIZE):
+    """
+    Streams the records of every URL, writing their names to out as one blob BATCH_ROWS records at a time. Returns (ages array, offsets array) where the name of row i spans offsets[i] to offsets[i + 1] of the blob.
+    """
+    ages = array('H')
+    offsets = array('Q', [0])
+    records = (record for url, chunks in url_io.prefetch(file_urls, bufsize) for record in stream_reader.stream_records(url, bufsize, chunks=chunks))
+    while True:
+        batch = list(islice(records, BATCH_ROWS))
+        if (len(batch) == 0):
+            break
+        ages.extend(record[0] for record in batch)
+        names = [record[1].encode(stream_reader.ENCODING) for record in batch]
+        offsets.extend(islice(accumulate(map(len, names), initial=offsets[-1]), 1, None))
+        out.write(b"".join(names))
+
+    return ages, offsets
+
+def write_segment(out, names_start, ages, offsets, prev, sources):
+    """
+    Writes the ages column, name offsets, footer and trailer of a segment after its names blob. Ages are packed into one byte each when they all fit, and offsets into four bytes when the blob is smaller than 4 GiB.
+    """
+    hist = [0] * columnar.HIST_SLOTS
+    firsts = [-1] * columnar.HIST_SLOTS
+    for age, count in Counter(ages).items():
+        hist[age] = count
+        firsts[age] = ages.index(age)
+    age_column = array('B', ages) if len(ages) == 0 or max(ages) < 256 else ages
+    offset_column = array('I', offsets) if offsets[-1] < 1 << 32 else offsets
+    ages_start = align(out)
+    age_column.tofile(out)
+    offsets_start = align(out)
+    offset_column.tofile(out)
+    footer_start = align(out)
+    encoded = json.dumps(sources).encode("utf-8")
+    out.write(columnar.FOOTER.pack(columnar.SEGMENT_MAGIC, len(ages), sum(ages), names_start, ages_start, offsets_start, prev, len(encoded),
+        (age_column.typecode + offset_column.typecode).encode("ascii")))
+    array('Q', hist).tofile(out)
+    array('q', firsts).tofile(out)
+    out.write(encoded)
+    out.write(columnar.TRAILER.pack(footer_start, columnar.END_MAGIC))
+
+def align(out, size=8):
+    """Pads out with zeros to a multiple of size bytes, so columns can be viewed as typed arrays. Returns the new position."""
+    pos = out.tell()
+    out.write(bytes(-pos % size))
+    return pos + (-pos % size)
+
+
+
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output", help="columnar file to create or append a segment to")
+    parser.add_argument("urls", nargs="*")
+    args = parser.parse_args()
+    rows, converted = convert(args.output, args.urls)
+    print("Converted", converted, "file(s),", rows, "rows appended to", args.output)
@@ -1,173 +1,166 @@
 """
         Author: Spencer Little (mrlittle@uw.edu)
-        Last edit: 01/06/2020
-        A module that reads personal data from csv files and reports median and average statistics using quickselect.
+        Last edit: 10/18/2026
+        A module that reads personal data from csv files and reports median and average statistics using a deterministic introselect (sampled three-way partitioning with a median-of-medians fallback).
 """
 
-from math import floor
-from random import randint
-import re
+from array import array
+from bisect import bisect_left
+from math import sqrt
+from random import Random
 import sys
 
+import instrument
+import order_stats
+import parallel
+import record_store
+import stream_reader
 
-def compute_stats(file_urls):
+SEED = 20200106 # fixed pivot seed, so runs (and benchmarks) are reproducible
+SAMPLE_SIZE = 1024 # values sampled to choose the band of each partitioning step
+SMALL = 64 # parts this small are sorted outright
+
+
+@instrument.staged("select")
+def compute_stats(file_urls, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1):
     """
-    Facillitates the processing of each URL passed by the user. Returns: average age, (median age, name of person with median age), total lines processed).
+    Facillitates the processing of each URL passed by the user. With more than one worker (None uses every CPU) URLs (or byte ranges of large URLs) are parsed in separate processes and their rows are concatenated in URL order. Returns: average age, (median age, name of person with median age), total lines processed).
     """
-    file_data = []
-    lines_procd = 0
-    clm_age = 0
-    for url in file_urls:
-        total, processed = process_file(url, file_data)
-        clm_age += total
-        lines_procd += processed
-    avg = 0 if lines_procd == 0 else clm_age/lines_procd
-    med = (0, "No data processed.") if lines_procd == 0 else get_median(file_data)
-
-    return round(avg, 2), med, lines_procd
-
-def get_median(file_data):
+    store = record_store.load(file_urls, bufsize, workers)
+    avg = 0 if len(store) == 0 else store.total_age/len(store)
+    med = (0, "No data processed.") if len(store) == 0 else get_median(store)
+
+    return round(avg, 2), med, len(store)
+
+@instrument.staged("select")
+def quantiles(file_urls, qs=order_stats.DEFAULT_QUANTILES, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1):
     """
-    Computes median and name of entity with median age (if one exists) using QuickSelect on the provided list. Assumes input is list of tuples (age, name).
+    Computes every quantile in qs from a single ingest of the URLs and a single multi-rank introselect over the ages. Returns a list of (quantile, age, name of person with that age) in the order of qs.
     """
-    if (len(file_data) % 2 == 0):
-        med1 = quickselect(file_data, 0, len(file_data) - 1, int(len(file_data)/2))
-        med2 = quickselect(file_data, 0, len(file_data) - 1, int((len(file_data)/2) + 1))
-        med = (med1[0] + med2[0]) / 2
-        med_data = med1 if med == med1[0] else (med, "No entity with true median exists in the list")
-    else:
-        med_data = quickselect(file_data, 0, len(file_data) - 1, floor(len(file_data)/2))
-
-    return med_data
+    store = record_store.load(file_urls, bufsize, workers)
+    if (len(store) == 0):
+        return order_stats.no_data(qs)
+    positions = order_stats.quantile_positions(len(store), qs)
+    ages = introselect(store.ages, order_stats.needed_ranks(positions))
 
+    return order_stats.quantile_results(qs, positions, {rank : (age, store.name(store.first_row(age))) for rank, age in ages.items()})
 
-def process_file(url, file_data):
+def get_median(store):
     """
-    Reads all lines from the provided url and passes the resulting list to process_lines for further processing.
+    Computes median and name of entity with median age (if one exists) using introselect on the ages of a RecordStore. Both middle ranks of an even count are selected in the same descent, and only the name of the reported entity is decoded.
     """
-    lines = []
-    try:
-        with open(url, 'r') as filein:
-            lines = filein.readlines()
-    except FileNotFoundError:
-        print("Unable to find url", url, ". Skipping...")
-        return (0, 0)
-    except OSError as err:
-        print("System error while reading file: ", err)
-    except:
-        print("Unknown error:", sys.exc_info()[1])
-
-    return process_lines(url, lines, file_data)
-
-def process_lines(url, lines, file_data):
+    low_rank, high_rank = (len(store) - 1) // 2, len(store) // 2
+    found = introselect(store.ages, [low_rank, high_rank])
+    med1, med2 = found[low_rank], found[high_rank]
+    med = (med1 + med2) / 2
+    med_data = (med1, store.name(store.first_row(med1))) if med == med1 else (med, "No entity with true median exists in the list")
+
+    return med_data
+
+
+def introselect(ages, ks, seed=SEED, guarded=False):
     """
-    Reads each line in the lines list, checks input format, then appends a new age-name tuple to the cumulative list of file data. Returns cumulative age of every entry in lines and the number of lines processed.
+    Selects several ranks of a sequence of ages in a single descent. Each step partitions the values three ways (below, within and above a band [lo, hi]) where the band is chosen from a seeded random sample to bracket the pending ranks, so they usually all land in a small middle part; when lo == hi this is a Dutch flag partition and ranks falling in the run of equal ages are settled immediately, which handles the heavy duplication of age data. A branch whose remaining part still holds more than 3/4 of its input switches to median-of-medians pivots, which bounds the worst case to linear time for a fixed number of ranks. ages is not modified. Returns a dictionary mapping each rank in ks to its age.
     """
-    form = process_head(lines[0].strip("\n"))
-    if (form == None):
-        print("File at", url, " improperly formatted. Skipping...\n")
-        return 0, 0
-
-    lformat = build_regex(form)
-    line_num = 1 # already processed line 1
-    lines_procd = 0
-    total_age = 0
-    while (line_num < len(lines)):
-        line = lines[line_num]
-        if (re.search(lformat, line) == None):
-            print("Inproperly formatted input in url, ", url, ", at line ", line_num + 1, ": \n", line)
-            line_num += 1
+    rng = Random(seed)
+    found = {}
+    pending = [(compact(ages), 0, sorted(set(ks)), guarded)]
+    while (len(pending) > 0):
+        values, base, ranks, guarded = pending.pop()
+        if (len(values) <= SMALL or (type(values) != bytes and len(ranks) > 2)): # a C sort beats several Python-level passes
+            ordered = sorted(values)
+            for k in ranks:
+                found[k] = ordered[k - base]
             continue
-        udata = line.split(",")
-        age = int(udata[form["age"]])
-        name = udata[form["lname"]].strip("\n") + ", " + udata[form["fname"]].strip("\n")
-        file_data.append((age, name))
-        line_num += 1
-        lines_procd += 1
-        total_age += age
-
-    return total_age, lines_procd
-
-def build_regex(form):
-    """Constructs a regex for validation of lines based on the form provided."""
-    reg = r"(?i)^"
-    for i in range(3):
-        elem = list(form.keys())[list(form.values()).index(i)]
-        if (elem != "age"):
-            reg += r"( ?\w{2,20})"
+        if (guarded):
+            lo = hi = mom_pivot(values)
         else:
-            reg += r"( ?\d{1,3})"
-        if (i < 2):
-            reg += "\,"
-
-    return reg + "$"
-
-def process_head(header):
+            lo, hi = choose_band(values, base, ranks, rng)
+        low_part = below(values, lo)
+        mid_part = None if lo == hi else within(values, lo, hi)
+        start = base + len(low_part)
+        end = start + (values.count(lo) if lo == hi else len(mid_part))
+        low_ranks = ranks[:bisect_left(ranks, start)]
+        high_ranks = ranks[bisect_left(ranks, end):]
+        mid_ranks = ranks[len(low_ranks):len(ranks) - len(high_ranks)]
+        limit = 3 * len(values) // 4
+        if (len(low_ranks) > 0):
+            pending.append((low_part, base, low_ranks, guarded or len(low_part) > limit))
+        if (len(mid_ranks) > 0 and lo == hi):
+            for k in mid_ranks:
+                found[k] = lo
+        elif (len(mid_ranks) > 0):
+            pending.append((mid_part, start, mid_ranks, guarded or len(mid_part) > limit))
+        if (len(high_ranks) > 0):
+            high_part = above(values, hi)
+            pending.append((high_part, end, high_ranks, guarded or len(high_part) > limit))
+
+    return found
+
+def choose_band(values, base, ranks, rng):
+    """
+    Chooses the band [lo, hi] of a partitioning step from a sorted random sample of the values. Ranks close together are bracketed with a margin of sqrt(sample size) sample positions on each side; ranks far apart are split across both sides by a single pivot between them.
     """
-    Processes the first line of the provided CSV file and returns a dictionary corresponding the order of the lname, fname, and age parameters.
+    size = min(SAMPLE_SIZE, len(values))
+    sample = sorted(values[rng.randrange(len(values))] for i in range(size))
+    first = (ranks[0] - base) * size // len(values)
+    last = (ranks[-1] - base) * size // len(values)
+    if (last - first > size // 8):
+        pivot = sample[(first + last) // 2]
+        return pivot, pivot
+    margin = int(sqrt(size))
+
+    return sample[max(0, first - margin)], sample[min(size - 1, last + margin)]
+
+def mom_pivot(values):
+    """Returns the median of the medians of groups of five values, which has at least 30% of the values on each side."""
+    medians = [sorted(values[i:i + 5])[(min(5, len(values) - i) - 1) // 2] for i in range(0, len(values), 5)]
+    mid = (len(medians) - 1) // 2
+    return introselect(medians, [mid], guarded=True)[mid]
+
+def compact(ages):
     """
-    fdict = {}
-    hformat = r"(?i)^( ?\w{2,20}\,){2} ?\w{2,20}$"
-    if (re.search(hformat, header) == None):
-        return None
-    params = [p.strip(" ") for p in header.split(",")]
+    Returns the ages as bytes when every age fits in a byte, which is always the case for real ages, so partitions run in C with bytes.translate; otherwise returns them unchanged and partitions fall back to list comprehensions.
+    """
+    if (isinstance(ages, array) and ages.typecode == 'H'):
+        raw = ages.tobytes()
+        low, high = (raw[0::2], raw[1::2]) if sys.byteorder == "little" else (raw[1::2], raw[0::2])
+        return low if high.count(0) == len(high) else ages
     try:
-        fdict.update({"age" : params.index("age")})
-        fdict.update({"fname" : params.index("fname")})
-        fdict.update({"lname" : params.index("lname")})
-    except ValueError:
-        return None
-
-    return fdict
-
-def quickselect(arr, l, r, k):
-    """Parition based selection algorithm derived from QuickSort."""
-    while (l - r != 1):
-        pivind, pivrange = partition(arr, l, r)
-
-        if (k in pivrange):
-            return arr[k]
-        elif (k > pivind):
-            l = pivind + 1
-        else:
-            r = pivind - 1
-
-    return arr[l]
+        return bytes(ages)
+    except (TypeError, ValueError):
+        return ages
 
-def partition(arr, l, r):
-    """Partitions a list around a random element."""
-    pivind = randint(l, r)
-    pivrange = []
-    swap(arr, pivind, r)
-    piv = arr[r]
-    lind = l
-    last = l
-    for x in range(l, r):
-        if (arr[x][0] == piv[0] and x - last == 1):
-            pivrange.append(x) # pivrange must be consecutive
-            last = x
-        if (arr[x][0] <= piv[0]):
-            swap(arr, x, lind)
-            lind+=1
+def below(values, lo):
+    """Returns the values less than lo."""
+    if (type(values) == bytes):
+        return values.translate(None, bytes(range(lo, 256)))
+    return [age for age in values if age < lo]
 
-    swap(arr, lind, r)
-    return lind, pivrange
+def within(values, lo, hi):
+    """Returns the values between lo and hi inclusive."""
+    if (type(values) == bytes):
+        return values.translate(None, bytes(range(lo)) + bytes(range(hi + 1, 256)))
+    return [age for age in values if lo <= age <= hi]
 
-
-def swap(arr, i, j):
-    """A helper method that swaps two elements in an array."""
-    tmp = arr[i]
-    arr[i] = arr[j]
-    arr[j] = tmp
+def above(values, hi):
+    """Returns the values greater than hi."""
+    if (type(values) == bytes):
+        return values.translate(None, bytes(range(hi + 1)))
+    return [age for age in values if age > hi]
 
 
 
 
 if __name__=='__main__':
-    file_urls = [url for url in sys.argv[1:]]
-    avg, med, procd = compute_stats(file_urls)
-    print("-"*30, "\nResults:\n")
-    print("Average age:", avg, "yrs")
-    print("Median age:", med[0], "yrs")
-    print("Median entity:", med[1])
-    print("Processed:", procd, "lines")
+    args = parallel.parse_args()
+    if (args.quantiles != None):
+        order_stats.print_quantiles(quantiles(args.urls, args.quantiles, workers=args.workers))
+    else:
+        avg, med, procd = compute_stats(args.urls, workers=args.workers)
+        print("-"*30, "\nResults:\n")
+        print("Average age:", avg, "yrs")
+        print("Median age:", med[0], "yrs")
+        print("Median entity:", med[1])
+        print("Processed:", procd, "lines")
+    instrument.write_report(args.report)
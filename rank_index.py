@@ -0,0 +1,243 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        An order-statistic index built from a single ingest, for answering many follow-up rank queries without reprocessing the input. A Fenwick (binary indexed) tree over the bounded age domain counts the entities of every age, and each age keeps the list of its entities in insertion order, so who is at rank k, how many people are younger than x and the median of the ages in [a, b] are answered by walking at most log2(AGE_SLOTS) tree nodes; records can be inserted and deleted in the same time.
+
+        Query mode (rank_index.py file1.csv ...) reads one command per line from stdin and replies to each with one line of JSON:
+            RANK k                      age and entity at (0-based) rank k
+            BELOW x                     number of entities younger than x
+            RANGE a b                   median of the ages in [a, b] and the number of entities in it
+            MEDIAN | AVERAGE | COUNT
+            QUANTILES q1,q2,...         (quantile, age, entity) of each quantile
+            INSERT fname, lname, age    insert a record, replying with its entity id
+            DELETE id                   delete an entity by id (see RANK)
+            QUIT
+"""
+
+from array import array
+import argparse
+import json
+import sys
+
+import hist_median
+import instrument
+import order_stats
+import parallel
+import record_store
+import stream_reader
+
+AGE_SLOTS = hist_median.AGE_SLOTS
+TOP = 1 << (AGE_SLOTS.bit_length() - 1) # highest power of two within the tree, where the descent of select starts
+RECORD_FORM = {"fname" : 0, "lname" : 1, "age" : 2} # column order of records sent with INSERT
+
+
+class RankIndex:
+    """
+    The entities of a RecordStore, and of records inserted afterwards, indexed by age. Entity ids below len(store) are rows of the store (whose names are read back from their files); higher ids are inserted records, whose names are kept in memory. buckets[age] lists the ids with that age in insertion order. Every deleted id is kept in deleted; one deleted from the middle of its bucket stays there, counted in dead, until the bucket is next read.
+    """
+
+    def __init__(self, store=None):
+        self.store = record_store.RecordStore() if store == None else store
+        self.base = len(self.store) # id of the first inserted record
+        self.added = [] # (age, name) of every inserted record
+        self.tree = [0] * (AGE_SLOTS + 1) # Fenwick tree, tree[i] counts the ages i - (i & -i) to i - 1
+        self.buckets = [array('I' if self.base < 1 << 31 else 'Q') for age in range(AGE_SLOTS)]
+        self.deleted = set()
+        self.dead = [0] * AGE_SLOTS # deleted ids still held in each bucket
+        self.count = 0
+        appends = [bucket.append for bucket in self.buckets]
+        for row, age in enumerate(self.store.ages):
+            appends[age](row)
+        for age in range(AGE_SLOTS):
+            self.change(age, len(self.buckets[age]))
+        self.total_age = self.store.total_age
+
+    def __len__(self):
+        return self.count
+
+    def change(self, age, delta):
+        """Adds delta entities of the provided age to the tree."""
+        self.count += delta
+        i = age + 1
+        while (i <= AGE_SLOTS):
+            self.tree[i] += delta
+            i += i & -i
+
+    def count_below(self, x):
+        """Returns the number of entities younger than x."""
+        i = min(max(x, 0), AGE_SLOTS)
+        below = 0
+        while (i > 0):
+            below += self.tree[i]
+            i &= i - 1
+        return below
+
+    def count_between(self, low, high):
+        """Returns the number of entities with an age in [low, high]."""
+        return max(0, self.count_below(high + 1) - self.count_below(low))
+
+    def select(self, k):
+        """Returns (age, entity id) at (0-based) rank k, ranking entities of equal age in insertion order. Raises IndexError if k is out of range."""
+        if (not 0 <= k < self.count):
+            raise IndexError("rank out of range: " + str(k))
+        pos = 0
+        step = TOP
+        while (step > 0):
+            if (pos + step <= AGE_SLOTS and self.tree[pos + step] <= k):
+                pos += step
+                k -= self.tree[pos]
+            step >>= 1
+        return pos, self.live_bucket(pos)[k]
+
+    def live_bucket(self, age):
+        """Returns the bucket of an age after dropping its deleted ids."""
+        bucket = self.buckets[age]
+        if (self.dead[age] > 0):
+            bucket = self.buckets[age] = array(bucket.typecode, [entity for entity in bucket if entity not in self.deleted])
+            self.dead[age] = 0
+        return bucket
+
+    def rank(self, k):
+        """Returns (age, name) of the entity at (0-based) rank k."""
+        age, entity = self.select(k)
+        return age, self.name(entity)
+
+    def name(self, entity):
+        """Returns the name ("lname, fname") of an entity."""
+        if (entity < self.base):
+            return self.store.name(entity)
+        return self.added[entity - self.base][1]
+
+    def age(self, entity):
+        """Returns the age of an entity."""
+        if (entity < self.base):
+            return self.store.ages[entity]
+        return self.added[entity - self.base][0]
+
+    def insert(self, age, name):
+        """Inserts a record. Returns its entity id."""
+        if (not 0 <= age < AGE_SLOTS):
+            raise ValueError("age out of range: " + str(age))
+        entity = self.base + len(self.added)
+        self.added.append((age, name))
+        try:
+            self.buckets[age].append(entity)
+        except OverflowError:
+            self.buckets[age] = array('Q', self.buckets[age])
+            self.buckets[age].append(entity)
+        self.change(age, 1)
+        self.total_age += age
+        return entity
+
+    def delete(self, entity):
+        """Deletes an entity by id. Raises KeyError if there is no such entity or it was already deleted."""
+        if (not 0 <= entity < self.base + len(self.added) or entity in self.deleted):
+            raise KeyError("no entity with id " + str(entity))
+        age = self.age(entity)
+        bucket = self.buckets[age]
+        if (bucket[-1] == entity):
+            bucket.pop()
+        else:
+            self.dead[age] += 1
+        self.deleted.add(entity)
+        self.change(age, -1)
+        self.total_age -= age
+
+    def average(self):
+        """Returns the average age of the entities."""
+        return 0 if self.count == 0 else round(self.total_age/self.count, 2)
+
+    def range_median(self, low=0, high=AGE_SLOTS - 1):
+        """
+        Returns (median age, name of an entity with the median age) of the entities with an age in [low, high], described like hist_median.get_median when the median falls between two ages or no entity is in the range.
+        """
+        start = self.count_below(low)
+        count = self.count_between(low, high)
+        if (count == 0):
+            return (0, "Median does not exist, no data in the range.")
+        lower = self.select(start + (count - 1) // 2)
+        upper = lower if count % 2 == 1 else self.select(start + count // 2)
+        if (lower[0] == upper[0]):
+            return (lower[0], self.name(lower[1]))
+
+        return ((lower[0] + upper[0]) / 2, "No entity exist in the provided list with the median age, outcome was between " + self.name(lower[1]) + " at " + str(lower[0]) + " years and " + self.name(upper[1]) + " at " + str(upper[0]) + " years.")
+
+    def median(self):
+        """Returns (median age, name of an entity with the median age) of every entity."""
+        return self.range_median()
+
+    def quantiles(self, qs=order_stats.DEFAULT_QUANTILES):
+        """Returns a list of (quantile, age, name of person with that age) in the order of qs."""
+        if (self.count == 0):
+            return order_stats.no_data(qs)
+        positions = order_stats.quantile_positions(self.count, qs)
+        return order_stats.quantile_results(qs, positions, {rank : self.rank(rank) for rank in order_stats.needed_ranks(positions)})
+
+
+@instrument.staged("insert")
+def build(file_urls, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1):
+    """Ingests every URL once (see record_store.load) and indexes its rows. Returns the RankIndex."""
+    return RankIndex(record_store.load(file_urls, bufsize, workers))
+
+def handle_command(index, line):
+    """Executes one query-mode command against the index. Returns the reply as a dictionary, or None when the command is QUIT."""
+    command, _, arg = line.strip().partition(" ")
+    command = command.upper()
+    args = arg.split()
+    try:
+        if (command == "RANK"):
+            age, entity = index.select(int(args[0]))
+            return {"age": age, "entity": index.name(entity), "id": entity}
+        elif (command == "BELOW"):
+            return {"below": index.count_below(int(args[0]))}
+        elif (command == "RANGE"):
+            low, high = int(args[0]), int(args[1])
+            med = index.range_median(low, high)
+            return {"median": med[0], "entity": med[1], "count": index.count_between(low, high)}
+        elif (command == "MEDIAN"):
+            med = index.median()
+            return {"median": med[0], "entity": med[1]}
+        elif (command == "AVERAGE"):
+            return {"average": index.average()}
+        elif (command == "COUNT"):
+            return {"count": len(index)}
+        elif (command == "QUANTILES"):
+            return {"quantiles": index.quantiles(order_stats.parse_quantiles(arg.strip()))}
+        elif (command == "INSERT"):
+            records = stream_reader.build_parser(RECORD_FORM)(arg.strip())
+            if (len(records) != 1):
+                return {"error": "improperly formatted record: " + arg.strip()}
+            return {"id": index.insert(*records[0]), "count": len(index)}
+        elif (command == "DELETE"):
+            index.delete(int(args[0]))
+            return {"count": len(index)}
+        elif (command == "QUIT"):
+            return None
+    except (IndexError, KeyError, ValueError, argparse.ArgumentTypeError) as err:
+        return {"error": str(err.args[0]) if len(args) > 0 else "missing argument to " + command}
+
+    return {"error": "unknown command: " + command}
+
+def serve(index, lines, out=sys.stdout):
+    """Answers the commands in lines (stdin in query mode), writing one JSON reply per line to out."""
+    for line in lines:
+        if (line.strip() == ""):
+            continue
+        reply = handle_command(index, line)
+        if (reply == None):
+            break
+        out.write(json.dumps(reply) + "\n")
+        out.flush()
+
+
+
+
+if __name__=='__main__':
+    parser = parallel.build_arg_parser()
+    parser.add_argument("-c", "--command", action="append", help="answer this command (repeatable) instead of reading commands from stdin")
+    args = parser.parse_args()
+    instrument.setup(args)
+    index = build(args.urls, workers=args.workers)
+    instrument.flush()
+    serve(index, sys.stdin if args.command == None else args.command)
+    instrument.write_report(args.report)
@@ -0,0 +1,166 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        Compact storage of parsed rows for the median modules that need every record. Ages are kept in an unsigned 16-bit array and each row is referenced by its file and byte offset, so a row costs 10 bytes instead of a tuple and a name string; names are only decoded, by re-reading their line, for the entities that are reported. Rows of columnar files (see preprocess.py) are copied in bulk from their age columns and referenced by their row index in the file.
+"""
+
+from array import array
+from bisect import bisect_right
+from functools import partial
+import sys
+
+import columnar
+import compressed_io
+import instrument
+import parallel
+import stream_reader
+import url_io
+
+
+class RecordStore:
+    """
+    The rows of a set of files in input order. Row i has age ages[i] and starts at byte offsets[i] of the file urls[j], where j is the last file with starts[j] <= i.
+    """
+
+    def __init__(self):
+        self.urls = []
+        self.starts = [] # index of the first row of each file
+        self.ages = array('H')
+        self.offsets = array('Q')
+        self.total_age = 0
+
+    def __len__(self):
+        return len(self.ages)
+
+    def begin_file(self, url, continued=True):
+        """Starts a new file unless continued and url is the file currently being added (consecutive byte ranges of one text file share an entry, while every columnar table needs one of its own since its rows are named by their index from the entry's start)."""
+        if (not continued or len(self.urls) == 0 or self.urls[-1] != url):
+            self.urls.append(url)
+            self.starts.append(len(self.ages))
+
+    def stream(self, url, bufsize=stream_reader.DEFAULT_BUFSIZE, chunks=None):
+        """Adds every row of the provided url (or of its prefetched chunks), yielding (age, row index) as each one is stored."""
+        self.begin_file(url)
+        tables = [] # first row of each columnar file added in bulk
+        for age, offset in stream_reader.stream_records(url, bufsize, True, chunks, lambda table: tables.append(self.add_table(table))):
+            self.ages.append(age)
+            self.offsets.append(offset)
+            self.total_age += age
+            yield age, len(self.ages) - 1
+        for start in tables:
+            yield from zip(self.ages[start:], range(start, len(self.ages)))
+
+    def add_file(self, url, bufsize=stream_reader.DEFAULT_BUFSIZE, chunks=None, resume=0, line_num=1, progress=None):
+        """Adds every row of the provided url (or of its prefetched chunks, from the resume position resume and line_num with progress reported to progress, see stream_reader.stream_records). Returns cumulative age of the rows and the number of rows."""
+        self.begin_file(url)
+        start = len(self.ages)
+        before = self.total_age
+        add_age, add_offset = self.ages.append, self.offsets.append
+        tables = []
+        for age, offset in stream_reader.stream_records(url, bufsize, True, chunks, lambda table: tables.append(self.add_table(table)), resume, line_num, progress):
+            add_age(age)
+            add_offset(offset)
+        if (len(tables) == 0):
+            self.total_age += sum(self.ages[start:])
+        return self.total_age - before, len(self.ages) - start
+
+    def add_table(self, table):
+        """
+        Adds every row of an opened columnar.ColumnarFile to the file currently being added. Age columns are copied at C speed (one-byte ages are widened by a strided slice assignment) and the sum comes from the footers; offsets are left zero since rows of columnar files are named by their index. Returns the index of the first row added.
+        """
+        self.begin_file(self.urls[-1], len(self.ages) == self.starts[-1]) # a columnar url listed twice in a row
+        start = len(self.ages)
+        for column in table.age_columns():
+            if (column.format == 'H'):
+                self.ages.frombytes(column)
+                continue
+            wide = bytearray(2 * len(column))
+            wide[(0 if sys.byteorder == "little" else 1)::2] = column
+            self.ages.frombytes(wide)
+        self.offsets.frombytes(bytes(8 * len(table)))
+        self.total_age += table.total
+        return start
+
+    def add_summary(self, url, summary):
+        """Adds the rows of a summary produced by summarize_rows for (a byte range of) url. Returns its cumulative age and number of rows."""
+        total, processed, ages, offsets = summary
+        self.begin_file(url, len(offsets) == 0 or offsets[0] != 0) # rows of a columnar file are numbered from 0, where a text file starts with its header
+        self.ages.extend(ages)
+        self.offsets.extend(offsets)
+        self.total_age += total
+        return total, processed
+
+    def locate(self, row):
+        """Returns (url, byte offset) of a row."""
+        return self.urls[bisect_right(self.starts, row) - 1], self.offsets[row]
+
+    def first_row(self, age):
+        """Returns the index of the first row with the provided age."""
+        return self.ages.index(age)
+
+    def name(self, row):
+        """Decodes the name of a row by re-reading its header and its line ("lname, fname" like the records of stream_reader); remote URLs are read with range requests and compressed files are decompressed up to the line. Rows of columnar files are read from their name blob by row index."""
+        url, offset = self.locate(row)
+        with compressed_io.open_input(url) as filein:
+            head = filein.read(len(columnar.MAGIC))
+        if (head == columnar.MAGIC):
+            with columnar.ColumnarFile(url) as table:
+                return table.name(row - self.starts[bisect_right(self.starts, row) - 1])
+
+        return stream_reader.read_names(url, [offset])[0]
+
+
+@instrument.staged("insert")
+def load(file_urls, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1, checkpoint=None):
+    """
+    Loads the rows of every URL into a RecordStore. With more than one worker (None uses every CPU) URLs (or byte ranges of large URLs) are parsed in separate processes and their rows are added in URL order. With a checkpoint (a checkpoint.Checkpoint of kind "rows") the rows are saved periodically and loading continues from the checkpoint it was resumed from.
+    """
+    if (checkpoint != None):
+        return resume_load(file_urls, checkpoint, bufsize, workers)
+    store = RecordStore()
+    if (parallel.resolve_workers(workers) > 1):
+        for url, summary in parallel.map_summaries(summarize_rows, file_urls, workers, bufsize, rows=True, keyed=True):
+            store.add_summary(url, summary)
+    else:
+        for url, chunks in url_io.prefetch(file_urls, bufsize):
+            store.add_file(url, bufsize, chunks)
+
+    return store
+
+def resume_load(file_urls, checkpoint, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1):
+    """
+    Like load, starting from the rows and position of the checkpoint resumed from (if any) and reporting the position reached to it after every block of lines (after every summary with more than one worker) so new rows are appended to it periodically. The checkpoint is removed once every URL is done.
+    """
+    store = RecordStore()
+    done, start, line_num = checkpoint.position()
+    saved = checkpoint.restore()
+    if (saved != None):
+        store.total_age = saved[0]
+        store.urls, store.starts = saved[2]
+        store.ages, store.offsets = checkpoint.restore_rows()
+    first = len(store) # first row of the url being added, whose age is not in total_age yet
+    checkpoint.track(lambda: (store.total_age + sum(store.ages[first:]), len(store), (store.urls, store.starts)), (store.ages, store.offsets))
+    if (parallel.resolve_workers(workers) > 1):
+        for done, (url, summary) in enumerate(parallel.map_summaries(summarize_rows, file_urls, workers, bufsize, rows=True, keyed=True, skip=done), done + 1):
+            store.add_summary(url, summary)
+            first = len(store)
+            checkpoint.advance(done)
+    else:
+        for done, (url, chunks) in enumerate(url_io.prefetch(list(file_urls)[done:], bufsize), done):
+            store.add_file(url, bufsize, chunks, start, line_num, partial(checkpoint.advance, done))
+            first = len(store)
+            start, line_num = 0, 1
+            checkpoint.advance(done + 1)
+    checkpoint.finish()
+
+    return store
+
+def summarize_rows(rows):
+    """Reduces a stream of (age, byte offset) rows to (cumulative age, rows processed, ages array, offsets array)."""
+    ages = array('H')
+    offsets = array('Q')
+    for age, offset in rows:
+        ages.append(age)
+        offsets.append(offset)
+
+    return sum(ages), len(ages), ages, offsets
@@ -0,0 +1,234 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        A module that reads personal data from csv files and reports the average and an approximate median using a KLL quantile sketch. The sketch uses fixed memory regardless of input size, serializes to a few KB and can be merged across files and processes; the rank error bound of the answer is reported alongside it.
+"""
+
+from array import array
+from functools import partial
+from math import ceil, log, sqrt
+import random
+import struct
+
+import instrument
+import order_stats
+import parallel
+import stream_reader
+
+DEFAULT_K = 200 # accuracy parameter, the sketch holds at most about 3k values
+BATCH_SIZE = 4096 # values buffered before they are compacted into the sketch
+CONFIDENCE = 0.99 # confidence of the reported rank error bound
+MERGE_SEED = (1 << 63) - 1 # seed of the sketch the others are merged into, apart from the task indexes seeding those
+HEADER = struct.Struct("<IQQdQ") # k, count, worst case error, sum of squared compaction weights, seed
+
+
+class KLLSketch:
+    """
+    A KLL sketch: a stack of compactors where every value at level h stands for 2^h input values. When the sketch is full, the lowest full level is sorted and every other value (starting at a random offset) is promoted to the next level. Each compaction at level h moves the rank of any query by at most 2^h, and by zero on average, which is what the error bounds track.
+    """
+
+    def __init__(self, k=DEFAULT_K, seed=0):
+        self.k = k
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.levels = [[]]
+        self.count = 0
+        self.size = 0
+        self.max_size = self.capacity(0)
+        self.worst_error = 0 # sum of 2^h over every compaction
+        self.sq_weights = 0.0 # sum of 4^h over every compaction
+
+    def capacity(self, level):
+        """Returns the capacity of a level; lower levels shrink geometrically by 2/3."""
+        return max(2, int(ceil(self.k * (2 / 3) ** (len(self.levels) - level - 1))))
+
+    def update(self, value):
+        """Adds a single value to the sketch."""
+        self.levels[0].append(value)
+        self.count += 1
+        self.size += 1
+        if (self.size >= self.max_size):
+            self.compress()
+
+    def extend(self, values):
+        """
+        Adds a batch of values to the sketch. The batch is compacted as a whole, which costs a single compaction per level instead of one per capacity worth of values, at the price of holding the batch in memory.
+        """
+        self.levels[0].extend(values)
+        self.count += len(values)
+        self.size += len(values)
+        while (self.size >= self.max_size):
+            self.compress()
+
+    def compress(self):
+        """Compacts the lowest full level until the sketch fits its capacity again."""
+        for level in range(len(self.levels)):
+            if (len(self.levels[level]) >= self.capacity(level)):
+                if (level + 1 == len(self.levels)):
+                    self.levels.append([])
+                items = sorted(self.levels[level])
+                self.levels[level] = [items.pop()] if len(items) % 2 == 1 else []
+                self.levels[level + 1].extend(items[self.rng.randint(0, 1)::2])
+                self.worst_error += 1 << level
+                self.sq_weights += 4.0 ** level
+                self.size = sum(len(items) for items in self.levels)
+                self.max_size = sum(self.capacity(h) for h in range(len(self.levels)))
+                if (self.size < self.max_size):
+                    break
+
+    def merge(self, other):
+        """Merges another sketch into this one, level by level."""
+        while (len(self.levels) < len(other.levels)):
+            self.levels.append([])
+        for level in range(len(other.levels)):
+            self.levels[level].extend(other.levels[level])
+        self.count += other.count
+        self.worst_error += other.worst_error
+        self.sq_weights += other.sq_weights
+        self.size = sum(len(items) for items in self.levels)
+        self.max_size = sum(self.capacity(h) for h in range(len(self.levels)))
+        while (self.size >= self.max_size):
+            self.compress()
+
+    def weighted(self):
+        """Returns the retained values as sorted (value, weight) pairs."""
+        return sorted((value, 1 << level) for level in range(len(self.levels)) for value in self.levels[level])
+
+    def select(self, rank):
+        """Returns the approximate value with (0-based) rank in the input."""
+        seen = 0
+        for value, weight in self.weighted():
+            seen += weight
+            if (seen > rank):
+                return value
+
+        return None
+
+    def select_ranks(self, ranks):
+        """Walks the retained values once and returns a dictionary mapping each of the ascending (0-based) ranks to its approximate value."""
+        values = {}
+        seen = 0
+        i = 0
+        for value, weight in self.weighted():
+            seen += weight
+            while (i < len(ranks) and ranks[i] < seen):
+                values[ranks[i]] = value
+                i += 1
+
+        return values
+
+    def median(self):
+        """Returns the approximate median, averaging the two middle ranks for even counts."""
+        low = self.select((self.count - 1) // 2)
+        high = self.select(self.count // 2)
+        return low if low == high else (low + high) / 2
+
+    def rank_error(self, confidence=CONFIDENCE):
+        """
+        Returns (error, worst case error): the rank error of any answer is at most error with the given confidence (Hoeffding bound over the zero-mean compaction errors) and never exceeds the worst case error.
+        """
+        error = sqrt(2 * self.sq_weights * log(2 / (1 - confidence)))
+        return min(int(ceil(error)), self.worst_error), self.worst_error
+
+    def to_bytes(self):
+        """Serializes the sketch: a fixed header, the number of values per level and the values as doubles."""
+        values = array('d', [value for items in self.levels for value in items])
+        sizes = array('I', [len(items) for items in self.levels])
+        return HEADER.pack(self.k, self.count, self.worst_error, self.sq_weights, self.seed) + struct.pack("<I", len(sizes)) + sizes.tobytes() + values.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Restores a sketch serialized with to_bytes."""
+        k, count, worst_error, sq_weights, seed = HEADER.unpack_from(data)
+        pos = HEADER.size
+        nlevels = struct.unpack_from("<I", data, pos)[0]
+        pos += 4
+        sizes = array('I')
+        sizes.frombytes(data[pos:pos + 4 * nlevels])
+        values = array('d')
+        values.frombytes(data[pos + 4 * nlevels:])
+        sketch = cls(k, seed)
+        sketch.levels = []
+        start = 0
+        for size in sizes:
+            sketch.levels.append([int(v) if v.is_integer() else v for v in values[start:start + size]])
+            start += size
+        sketch.count, sketch.worst_error, sketch.sq_weights = count, worst_error, sq_weights
+        sketch.size = start
+        sketch.max_size = sum(sketch.capacity(h) for h in range(len(sketch.levels)))
+        return sketch
+
+
+@instrument.staged("select")
+def compute_stats(file_urls, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1, k=DEFAULT_K):
+    """
+    Facillitates the processing of each URL passed by the user. With more than one worker (None uses every CPU) each URL (or byte range of a large URL) is sketched in a separate process and the sketches are merged in URL order. Returns: average age, (approximate median age, description of its rank error bound), total lines processed).
+    """
+    clm_age, lines_procd, sketch = compute_sketch(file_urls, bufsize, workers, k)
+    avg = 0 if lines_procd == 0 else round(clm_age/lines_procd, 2)
+    if (lines_procd == 0):
+        return avg, (0, "Median does not exist, no data processed."), lines_procd
+
+    error, worst = sketch.rank_error()
+    med_desc = "Approximate median (sketch of " + str(sketch.size) + " values), rank error at most " + str(error) + " of " + str(lines_procd) + " with " + str(int(CONFIDENCE * 100)) + "% confidence and at most " + str(worst) + " in the worst case. No entity is tracked by the sketch."
+    return avg, (sketch.median(), med_desc), lines_procd
+
+@instrument.staged("select")
+def quantiles(file_urls, qs=order_stats.DEFAULT_QUANTILES, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1, k=DEFAULT_K):
+    """
+    Computes every quantile in qs from a single sketch of the URLs and a single walk over its retained values. Returns a list of (quantile, approximate age, description of the rank error bound) in the order of qs; the sketch tracks no entities.
+    """
+    clm_age, lines_procd, sketch = compute_sketch(file_urls, bufsize, workers, k)
+    if (lines_procd == 0):
+        return order_stats.no_data(qs)
+    positions = order_stats.quantile_positions(lines_procd, qs)
+    values = sketch.select_ranks(order_stats.needed_ranks(positions))
+    error, worst = sketch.rank_error()
+    desc = "Approximate, rank error at most " + str(error) + " of " + str(lines_procd) + " with " + str(int(CONFIDENCE * 100)) + "% confidence and at most " + str(worst) + " in the worst case."
+
+    return [(q, order_stats.interpolate(values[low], values[high], frac), desc) for q, (low, high, frac) in zip(qs, positions)]
+
+@instrument.staged("insert")
+def compute_sketch(file_urls, bufsize=stream_reader.DEFAULT_BUFSIZE, workers=1, k=DEFAULT_K):
+    """Returns (cumulative age, lines processed, merged sketch) over every URL."""
+    sketch = KLLSketch(k, MERGE_SEED)
+    clm_age = 0
+    lines_procd = 0
+    for total, processed, data in parallel.map_summaries(partial(summarize_records, k=k), file_urls, workers, bufsize, seeded=True):
+        sketch.merge(KLLSketch.from_bytes(data))
+        clm_age += total
+        lines_procd += processed
+
+    return clm_age, lines_procd, sketch
+
+def summarize_records(records, k=DEFAULT_K, seed=0):
+    """Reduces a stream of records to (cumulative age, lines processed, serialized sketch of the ages). Sketches merged together need distinct seeds, or their compactions all round the same way and the rank errors add up instead of averaging out."""
+    sketch = KLLSketch(k, seed)
+    total_age = 0
+    batch = []
+    for age, name in records:
+        batch.append(age)
+        if (len(batch) == BATCH_SIZE):
+            sketch.extend(batch)
+            total_age += sum(batch)
+            batch = []
+    sketch.extend(batch)
+    total_age += sum(batch)
+
+    return total_age, sketch.count, sketch.to_bytes()
+
+
+
+
+if __name__=='__main__':
+    args = parallel.parse_args()
+    if (args.quantiles != None):
+        order_stats.print_quantiles(quantiles(args.urls, args.quantiles, workers=args.workers))
+    else:
+        avg, med, procd = compute_stats(args.urls, workers=args.workers)
+        print("-"*30, "\nResults:\n")
+        print("Average age:", avg, "yrs")
+        print("Median age:", med[0], "yrs")
+        print("Median entity:", med[1])
+        print("Processed:", procd, "lines")
+    instrument.write_report(args.report)
@@ -0,0 +1,350 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        Shared streaming reader used by every median module. A file is consumed as a generator pipeline (buffered chunk read -> split into blocks of whole lines -> validate and parse) so peak memory is bounded by the buffer size rather than the file size.
+"""
+
+from itertools import accumulate, chain, compress, count
+from operator import add, itemgetter
+import mmap
+import re
+import sys
+
+import columnar
+import compressed_io
+import instrument
+import url_io
+
+DEFAULT_BUFSIZE = 1 << 20 # bytes read from disk per chunk
+ENCODING = "utf-8"
+HEADER_FORMAT = re.compile(r"(?i)^( ?\w{2,20}\,){2} ?\w{2,20}$")
+
+
+def stream_records(url, bufsize=DEFAULT_BUFSIZE, rows=False, chunks=None, columnar_file=None, start=0, line_num=1, progress=None):
+    """
+    Opens the provided url (a local path or an http(s) address whose data may be compressed, see url_io and compressed_io, or a columnar file) and yields an (age, name) tuple for every properly formatted line, or an (age, byte offset of the line) tuple with rows; chunks may supply its contents already being read by url_io.prefetch. Unreadable files, improperly formatted files and malformed lines are reported and skipped (see parse_stream for the other arguments).
+    """
+    instrument.count("urls")
+    try:
+        if (chunks == None):
+            with instrument.stage("read"):
+                filein = url_io.open_url(url)
+            with filein:
+                yield from parse_stream(url, read_chunks(filein, bufsize), bufsize, rows, columnar_file, start, line_num, progress)
+        else:
+            yield from parse_stream(url, chunks, bufsize, rows, columnar_file, start, line_num, progress)
+    except FileNotFoundError:
+        instrument.count("failed_urls")
+        print("Unable to find url", url, ". Skipping...")
+    except OSError as err:
+        instrument.count("failed_urls")
+        print("System error while reading file: ", err)
+    except Exception:
+        instrument.count("failed_urls")
+        print("Unknown error:", sys.exc_info()[1])
+    finally:
+        instrument.end_url(url)
+
+def parse_stream(url, chunks, bufsize=DEFAULT_BUFSIZE, rows=False, columnar_file=None, start=0, line_num=1, progress=None):
+    """
+    Decompresses a stream of byte chunks if needed, processes its header line and parses the lines that follow it (see stream_records). Byte offsets of rows refer to the decompressed data. rows may also be a function with the arguments of parse_rows, taking the header's form in place of parse, which then parses the blocks of lines and whose output is yielded as is. A columnar file (see preprocess.py) yields its rows with their row index in place of the byte offset, unless columnar_file is provided: it then receives the opened columnar.ColumnarFile and nothing is yielded. To resume part way (see checkpoint.py), start bytes of the data after the header are skipped and line_num is the number of lines before them; progress(start, line_num) is called with the position reached before each block of lines is parsed, the only positions a file can be resumed from.
+    """
+    chunks = iter(instrument.timed(compressed_io.decompress(instrument.timed(chunks, "read"), bufsize), "decompress"))
+    first = next(chunks, b"")
+    if (first.startswith(columnar.MAGIC)):
+        yield from read_columnar(url, rows, columnar_file)
+        return
+    with instrument.stage("header"):
+        header, chunks = split_header(chain((first,), chunks))
+        form = process_head(decode_line(header.rstrip(b"\n")))
+    if (form == None):
+        print("File at", url, " improperly formatted. Skipping...\n")
+        return
+    blocks = instrument.timed(split_blocks(skip_bytes(chunks, start) if start > 0 else chunks), "split")
+    if (progress != None):
+        blocks = track_blocks(blocks, start, line_num, progress)
+    if (callable(rows)):
+        yield from rows(url, blocks, form, len(header) + start, line_num)
+    elif (rows):
+        yield from parse_rows(url, blocks, build_row_parser(form), len(header) + start, line_num)
+    else:
+        yield from parse_blocks(url, blocks, build_parser(form), line_num)
+
+def read_columnar(url, rows=False, columnar_file=None):
+    """Memory-maps a columnar file and yields its records (see stream_records), or hands it to columnar_file. Columnar files must be local and uncompressed."""
+    if (url_io.is_remote(url)):
+        print("Columnar file at", url, " must be a local file. Skipping...")
+        return
+    with columnar.ColumnarFile(url) as table:
+        instrument.count("lines", len(table))
+        if (columnar_file != None):
+            columnar_file(table)
+        else:
+            yield from table.records(rows)
+
+def split_header(chunks):
+    """Separates the first line from a stream of byte chunks. Returns (first line with its newline, iterator over the bytes that follow it)."""
+    chunks = iter(chunks)
+    head = b""
+    for chunk in chunks:
+        cut = chunk.find(b"\n")
+        if (cut != -1):
+            return head + chunk[:cut + 1], chain((chunk[cut + 1:],), chunks)
+        head += chunk
+
+    return head, chunks
+
+def collect_records(records):
+    """
+    Collects a stream of records into a list. Returns (cumulative age, lines processed, list of (age, name) tuples in file order); used as the partial summary when input is processed in worker processes.
+    """
+    records = list(records)
+    return sum(record[0] for record in records), len(records), records
+
+def stream_range(url, form, start, end, report, bufsize=DEFAULT_BUFSIZE, tally=None, rows=False):
+    """
+    Memory-maps the provided url and yields the records (or with rows, the (age, byte offset) pairs) found in the byte range [start, end), which must begin and end on line boundaries. Malformed lines are passed to report with their line number relative to the start of the range, and tally[0] is incremented by the number of lines read.
+    """
+    with open(url, 'rb') as filein:
+        with mmap.mmap(filein.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            blocks = count_lines(split_blocks(read_mapped(mapped, start, end, bufsize)), tally)
+            if (rows):
+                yield from parse_rows(url, blocks, build_row_parser(form), start, 0, report)
+            else:
+                yield from parse_blocks(url, blocks, build_parser(form), 0, report)
+
+def read_mapped(mapped, start, end, bufsize=DEFAULT_BUFSIZE):
+    """Yields successive chunks of at most bufsize bytes from the range [start, end) of a memory-mapped file."""
+    for pos in range(start, end, bufsize):
+        yield mapped[pos:min(pos + bufsize, end)]
+
+def skip_bytes(chunks, count):
+    """Drops the first count bytes of a stream of byte chunks."""
+    chunks = iter(chunks)
+    for chunk in chunks:
+        if (count < len(chunk)):
+            yield chunk[count:]
+            yield from chunks
+            return
+        count -= len(chunk)
+
+def track_blocks(blocks, start, line_num, progress):
+    """Passes blocks through unchanged, calling progress(position, lines before it) before each one, where position counts bytes from start."""
+    for block in blocks:
+        progress(start, line_num)
+        yield block
+        start += len(block)
+        line_num += block.count(b"\n") + (not block.endswith(b"\n"))
+
+def count_lines(blocks, tally):
+    """Passes blocks through unchanged while adding the number of lines they hold to tally[0]."""
+    for block in blocks:
+        if (tally != None):
+            tally[0] += block.count(b"\n") + (not block.endswith(b"\n"))
+        yield block
+
+def split_ranges(url, parts):
+    """
+    Splits the body of the provided url (everything after the header line) into at most parts byte ranges aligned to line boundaries. Returns (form, [(start, end), ...]); form is None if the header is improperly formatted.
+    """
+    with open(url, 'rb') as filein:
+        with mmap.mmap(filein.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            size = len(mapped)
+            head_end = mapped.find(b"\n")
+            head_end = size if head_end == -1 else head_end + 1
+            form = process_head(decode_line(mapped[:head_end].rstrip(b"\n")))
+            bounds = [head_end]
+            for i in range(1, parts):
+                target = max(bounds[-1], head_end + (size - head_end) * i // parts)
+                cut = mapped.find(b"\n", target)
+                if (cut == -1 or cut + 1 >= size):
+                    break
+                if (cut + 1 > bounds[-1]):
+                    bounds.append(cut + 1)
+            bounds.append(size)
+
+    return form, [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+def read_chunks(filein, bufsize=DEFAULT_BUFSIZE):
+    """Yields successive chunks of at most bufsize bytes from a binary file object."""
+    while True:
+        chunk = filein.read(bufsize)
+        if (not chunk):
+            return
+        yield chunk
+
+def split_blocks(chunks):
+    """
+    Regroups a stream of byte chunks into blocks of complete lines. A partial line at the end of a chunk is carried over into the next block, so only the final block may lack a trailing newline.
+    """
+    tail = b""
+    for chunk in chunks:
+        cut = chunk.rfind(b"\n") + 1
+        if (cut == 0):
+            tail += chunk
+            continue
+        yield tail + chunk[:cut]
+        tail = chunk[cut:]
+    if (tail):
+        yield tail
+
+def decode_line(line):
+    """Decodes a raw line, dropping a trailing carriage return left by CRLF line endings. Returns None if the line cannot be decoded."""
+    if (line.endswith(b"\r")):
+        line = line[:-1]
+    try:
+        return line.decode(ENCODING)
+    except UnicodeDecodeError:
+        return None
+
+def read_names(url, offsets):
+    """Decodes the names ("lname, fname" like the records of parse_blocks) of the lines at the provided byte offsets of the (decompressed) data of url by re-reading its header and each of those lines; remote URLs are read with range requests. Returns the names in the order of offsets."""
+    with compressed_io.open_input(url) as filein:
+        parse = build_parser(process_head(decode_line(filein.readline().rstrip(b"\n"))))
+    names = []
+    for offset in offsets:
+        with compressed_io.open_input(url, offset) as filein:
+            names.append(parse(decode_line(filein.readline().rstrip(b"\n")))[0][1])
+
+    return names
+
+def parse_blocks(url, blocks, parse, line_num=1, report=None):
+    """
+    Validates and parses each block of lines with the provided parser, yielding an (age, name) tuple for every properly formatted line. A block is parsed in a single call that also picks out its malformed lines, which are reported with their line number and skipped. line_num is the number of lines preceding the first block (the header by default) and report(url, line_num, text) receives malformed lines (report_line by default).
+    """
+    report = report_line if report == None else report
+    for block in blocks:
+        lines = block.count(b"\n") + (not block.endswith(b"\n"))
+        bad = []
+        with instrument.stage("parse"):
+            records = parse(decode_block(block), bad)
+        if (len(bad) > 0):
+            with instrument.stage("validate"):
+                report_lines(url, bad, line_num, report)
+        instrument.count("lines", lines)
+        line_num += lines
+        yield from records
+
+def parse_rows(url, blocks, parse, offset, line_num=1, report=None):
+    """
+    Like parse_blocks, but yields an (age, byte offset of the line) tuple for every properly formatted line, where offset is the position of the first block in the file. parse must come from build_row_parser, which validates names without extracting them, so no name strings are built. Blocks are parsed by the faster pattern that only matches good lines until one holds malformed lines; that block and the rest of the file are then parsed by the pattern that also locates malformed lines.
+    """
+    report = report_line if report == None else report
+    dirty = False
+    for block in blocks:
+        lines = block.split(b"\n")
+        if (block.endswith(b"\n")):
+            lines.pop()
+        with instrument.stage("parse"):
+            text = decode_block(block)
+            ages = None if dirty else parse(text)
+        starts = map(add, accumulate(map(len, lines), initial=offset), count()) # line i starts after i newlines
+        if (ages != None and len(ages) == len(lines)):
+            found = zip(ages, starts)
+        else:
+            dirty = True
+            with instrument.stage("validate"):
+                bad = []
+                ages = parse(text, bad)
+                found = zip(map(int, filter(None, ages)), compress(starts, ages))
+                report_lines(url, bad, line_num, report)
+        instrument.count("lines", len(lines))
+        line_num += len(lines)
+        offset += len(block)
+        yield from found
+
+def decode_block(block):
+    """Decodes a block of lines for the parsers, with CRLF line endings turned into LF. Undecodable bytes become U+FFFD, which no field accepts, so lines holding them are rejected."""
+    text = block.decode(ENCODING, "replace")
+    if ("\r" in text):
+        text = text.replace("\r\n", "\n")
+        if (text.endswith("\r")):
+            text = text[:-1]
+    return text
+
+def report_lines(url, bad, line_num, report):
+    """Passes the (line index, text) malformed lines of a block to report with their line number, where line_num is the number of lines preceding the block."""
+    for index, line in bad:
+        report(url, line_num + index + 1, line)
+
+def report_line(url, line_num, text):
+    """Reports a malformed line and its line number. Lines are counted for every url but only written up to the cap and sample rate set with instrument.configure, in batches."""
+    instrument.reject(url, line_num, text)
+
+def build_parser(form):
+    """
+    Compiles a parser for the column order described by form. The returned function takes text holding one or more lines and returns an (age, name) tuple for each line that matches build_regex(form), validating and extracting every field in a single pass of the compiled pattern. The pattern also matches every other line as a whole (see build_regex), so given a list bad the same pass appends (line index, text) of each malformed line to it.
+    """
+    pattern = re.compile(build_regex(form, malformed=True), re.MULTILINE)
+    age_col, lname_col, fname_col = form["age"], form["lname"], form["fname"]
+
+    def parse(text, bad=None):
+        found = pattern.findall(text, 0, len(text) - text.endswith("\n"))
+        records = [(int(m[age_col]), m[lname_col] + ", " + m[fname_col]) for m in found if m[age_col]]
+        if (bad != None and len(records) != len(found)):
+            find_malformed(list(map(itemgetter(age_col), found)), found, bad)
+        return records
+
+    return parse
+
+def build_row_parser(form):
+    """
+    Compiles a parser for the column order described by form that accepts exactly the lines build_parser does but only captures the age. The returned function takes text holding one or more lines and returns the age of each line that matches. Given a list bad, it instead returns the age text of every line, empty for each line that does not match, and appends (line index, text) of those lines to bad.
+    """
+    pattern = re.compile(build_regex(form, False), re.MULTILINE)
+    checked = re.compile(build_regex(form, False, True), re.MULTILINE)
+
+    def parse(text, bad=None):
+        if (bad == None):
+            return list(map(int, pattern.findall(text)))
+        found = checked.findall(text, 0, len(text) - text.endswith("\n"))
+        ages = list(map(itemgetter(0), found))
+        find_malformed(ages, found, bad)
+        return ages
+
+    return parse
+
+def find_malformed(ages, found, bad):
+    """Appends (line index, text) of every line whose age text in ages is empty to bad, where found holds the matches of a pattern built with malformed (see build_regex)."""
+    index = -1
+    try:
+        while True:
+            index = ages.index("", index + 1)
+            bad.append((index, found[index][-1]))
+    except ValueError:
+        pass
+
+def build_regex(form, capture_names=True, malformed=False):
+    """Constructs a regex for validation of lines based on the form provided. Without capture_names only the age is captured. With malformed, any other line is matched too, as a whole by a last group, leaving the field groups empty."""
+    columns = [None] * 3
+    for elem, col in form.items():
+        columns[col] = elem
+    reg = r"(?i)^(?:" if malformed else r"(?i)^"
+    for i in range(3):
+        if (columns[i] != "age"):
+            reg += r"( ?\w{2,20})" if capture_names else r"(?: ?\w{2,20})"
+        else:
+            reg += r"( ?\d{1,3})"
+        if (i < 2):
+            reg += "\,"
+
+    return reg + (r"|(.*))$" if malformed else "$")
+
+def process_head(header):
+    """
+    Processes the first line of the provided CSV file and returns a dictionary corresponding the order of the lname, fname, and age parameters.
+    """
+    if (header == None):
+        return None
+    fdict = {}
+    if (HEADER_FORMAT.search(header) == None):
+        return None
+    params = [p.strip(" ") for p in header.split(",")]
+    try:
+        fdict.update({"age" : params.index("age")})
+        fdict.update({"fname" : params.index("fname")})
+        fdict.update({"lname" : params.index("lname")})
+    except ValueError:
+        return None
+
+    return fdict
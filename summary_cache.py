@@ -0,0 +1,126 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        A persistent, size-bounded cache of per-file summaries stored in a SQLite database. A file's summary is reused as long as its identity (path, size, modification time and inode) is unchanged, or, when only those changed, as long as its content hash is, so repeated runs over the same files skip parsing entirely and usually reading as well.
+"""
+
+from hashlib import blake2b
+import json
+import os
+import sqlite3
+import sys
+import time
+import zlib
+
+import compressed_io
+import parallel
+import stream_reader
+
+CACHE_FILE = "summaries.sqlite3"
+MAX_ENTRIES = 100000 # least recently used summaries beyond this are evicted
+HASH_BUFSIZE = 1 << 20
+
+
+def map_cached(reduce, file_urls, cache_dir, workers=1, bufsize=stream_reader.DEFAULT_BUFSIZE, max_entries=MAX_ENTRIES):
+    """
+    Yields the summary reduce(records) of every url in file_urls order, like parallel.map_summaries, but serves unchanged files from the cache in cache_dir and stores the summaries of the files that had to be processed. Summaries are stored as JSON, so they must be made of numbers, strings, None, lists and tuples (a summary comes back as a tuple of lists).
+    """
+    conn = open_cache(cache_dir)
+    try:
+        keys = [file_key(url) for url in file_urls]
+        summaries = [None if key == None else lookup(conn, reduce, key) for key in keys]
+        misses = [i for i in range(len(file_urls)) if summaries[i] == None]
+        processed = parallel.map_summaries(reduce, [file_urls[i] for i in misses], workers, bufsize)
+        for i, summary in zip(misses, processed):
+            summaries[i] = summary
+            if (keys[i] != None):
+                content = content_key(file_urls[i])
+                if (content != None):
+                    store(conn, reduce, keys[i], content, summary)
+        evict(conn, max_entries)
+        conn.commit()
+    finally:
+        conn.close()
+
+    yield from summaries
+
+def open_cache(cache_dir):
+    """Opens (creating if necessary) the summary database in cache_dir."""
+    os.makedirs(cache_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(cache_dir, CACHE_FILE))
+    if ("inode" not in [column[1] for column in conn.execute("PRAGMA table_info(summaries)")]):
+        conn.execute("DROP TABLE IF EXISTS summaries") # written by a version that pickled summaries and hashed every file
+    conn.execute("""CREATE TABLE IF NOT EXISTS summaries (
+        path TEXT, reducer TEXT, size INTEGER, mtime_ns INTEGER, inode INTEGER, digest TEXT,
+        line_count INTEGER, age_sum INTEGER, rejected INTEGER, summary BLOB, last_used REAL,
+        PRIMARY KEY (path, reducer))""")
+    return conn
+
+def file_key(url):
+    """Returns the identity of a file from a single stat: (absolute path, size, modification time in ns, inode), or None if the file cannot be read."""
+    try:
+        info = os.stat(url)
+    except OSError:
+        return None
+
+    return os.path.abspath(url), info.st_size, info.st_mtime_ns, info.st_ino
+
+def content_key(url):
+    """
+    Reads a file once to compute (content hash, number of lines after the header, or None for a compressed file). Returns None if the file cannot be read.
+    """
+    try:
+        digest = blake2b(digest_size=20)
+        newlines = 0
+        last = b"\n"
+        compressed = None
+        with open(url, 'rb') as filein:
+            for chunk in stream_reader.read_chunks(filein, HASH_BUFSIZE):
+                if (compressed == None):
+                    compressed = compressed_io.detect(chunk) != None
+                digest.update(chunk)
+                newlines += chunk.count(b"\n")
+                last = chunk[-1:]
+    except OSError:
+        return None
+
+    return digest.hexdigest(), None if compressed else max(0, newlines + (last != b"\n") - 1)
+
+def reducer_name(reduce):
+    """Names the reduce function so summaries of different shapes never collide."""
+    module = reduce.__module__
+    if (module == "__main__"): # same name whether the engine is imported or run as a script
+        module = os.path.splitext(os.path.basename(sys.modules["__main__"].__file__))[0]
+    return module + "." + reduce.__qualname__
+
+def lookup(conn, reduce, key):
+    """
+    Returns the cached summary for the file identified by key, or None if it is absent or stale. A file whose size is unchanged but whose modification time or inode is (touched, copied back or restored) is hashed, and its summary is still served, with the new identity recorded, if the content hash matches.
+    """
+    path, size, mtime_ns, inode = key
+    row = conn.execute("SELECT size, mtime_ns, inode, digest, summary FROM summaries WHERE path = ? AND reducer = ?", (path, reducer_name(reduce))).fetchone()
+    if (row == None or row[0] != size):
+        return None
+    if (tuple(row[1:3]) != (mtime_ns, inode)):
+        content = content_key(path)
+        if (content == None or content[0] != row[3]):
+            return None
+        conn.execute("UPDATE summaries SET mtime_ns = ?, inode = ? WHERE path = ? AND reducer = ?", (mtime_ns, inode, path, reducer_name(reduce)))
+    conn.execute("UPDATE summaries SET last_used = ? WHERE path = ? AND reducer = ?", (time.time(), path, reducer_name(reduce)))
+
+    return tuple(json.loads(zlib.decompress(row[4])))
+
+def store(conn, reduce, key, content, summary):
+    """
+    Stores the summary of the file identified by key and content (see content_key). Summaries start with (cumulative age, lines processed), which are kept alongside the number of rejected lines (unknown for compressed files, whose lines are not counted when hashing).
+    """
+    path, size, mtime_ns, inode = key
+    digest, line_count = content
+    age_sum, processed = summary[0], summary[1]
+    blob = zlib.compress(json.dumps(summary, separators=(",", ":")).encode("utf-8"))
+    conn.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (path, reducer_name(reduce), size, mtime_ns, inode, digest, processed, age_sum, None if line_count == None else line_count - processed, blob, time.time()))
+
+def evict(conn, max_entries):
+    """Removes the least recently used summaries beyond max_entries."""
+    conn.execute("DELETE FROM summaries WHERE rowid NOT IN (SELECT rowid FROM summaries ORDER BY last_used DESC LIMIT ?)", (max_entries,))
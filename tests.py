@@ -1,99 +1,453 @@
 """
         Author: Spencer Little (mrlittle@uw.edu)
-        Last edit: 01/06/2020
-        Computes median and average over a set of URLs using pythons standard library statistics module, then compares with heap_median and qs_median.
+        Last edit: 10/18/2026
+        Computes median and average over a set of URLs using pythons standard library statistics module, then compares with the other median implementations and processing modes.
 """
 
+import checkpoint
+import gentestfile
+import group_median
 import heap_median
+import hist_median
+import incremental
+import instrument
+import median_service
+import np_median
+import parallel
+import preprocess
 import qs_median
+import rank_index
+import record_store
+import sketch_median
 import stat_median
+import asyncio
+import bisect
+import bz2
+import compressed_io
+import gzip
+import json
+import lzma
+import math
+import os
 import re
 import statistics
+import stream_reader
 import sys
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 
-def compute_stats(file_urls):
+def compute_stats(file_urls, bufsize=stream_reader.DEFAULT_BUFSIZE):
     """
     Facillitates the processing of each URL passed by the user. Returns: average age, (median age, name of person with median age), total lines processed).
     """
     all_ages = []
     for url in file_urls:
-        process_file(url, all_ages)
+        process_file(url, all_ages, bufsize)
 
     return round(statistics.mean(all_ages), 2), statistics.median(all_ages), len(all_ages)
 
 
-def process_file(url, all_ages):
+def process_file(url, all_ages, bufsize=stream_reader.DEFAULT_BUFSIZE):
     """
-    Reads all lines from the provided url and passes the resulting list to process_lines for further processing.
+    Streams the records of the provided url and adds each extracted age to the cumulative list.
     """
-    lines = []
-    try:
-        with open(url, 'r') as filein:
-            lines = filein.readlines()
-    except FileNotFoundError:
-        print("Unable to find url", url, ". Skipping...")
-        return (0, 0)
-    except OSError as err:
-        print("System error while reading file: ", err)
-    except:
-        print("Unknown error:", sys.exc_info()[1])
-
-    process_lines(url, lines, all_ages)
-
-def process_lines(url, lines, all_ages):
-    """
-    Reads each line in the lines list, checks input format, then adds the extracted age to the cumulative list if the format is valid. Returns cumulative age of every entry in lines and the number of lines processed.
-    """
-    form = process_head(lines[0].strip("\n"))
-    if (form == None):
-        print("File at", url, " improperly formatted. Skipping...\n")
-        return 0, 0
-
-    lformat = build_regex(form)
-    line_num = 1 # already processed line 1
-    total_age = 0
-    while (line_num < len(lines)):
-        line = lines[line_num]
-        if (re.search(lformat, line) == None):
-            print("Inproperly formatted input in url, ", url, ", at line ", line_num + 1, ": \n", line)
-            line_num += 1
-            continue
-        udata = line.split(",")
-        age = int(udata[form["age"]])
+    for age, name in stream_reader.stream_records(url, bufsize):
         all_ages.append(age)
-        line_num += 1
 
-def build_regex(form):
-    """Constructs a regex for validation of lines based on the form provided."""
-    reg = r"(?i)^"
-    for i in range(3):
-        elem = list(form.keys())[list(form.values()).index(i)]
-        if (elem != "age"):
-            reg += r"( ?\w{2,20})"
-        else:
-            reg += r"( ?\d{1,3})"
-        if (i < 2):
-            reg += "\,"
+def check_parser(file_urls):
+    """
+    Parses each URL line by line with the reference regex from build_regex and compares the extracted records with those produced by stream_reader's compiled parser, and the line numbers of the malformed lines with those reported by the record and row parsers over small blocks.
+    """
+    for url in file_urls:
+        expected = []
+        bad_lines = []
+        try:
+            with open(url, 'r', encoding=stream_reader.ENCODING) as filein:
+                lines = filein.readlines()
+            with open(url, 'rb') as filein:
+                header = filein.readline()
+                body = filein.read()
+        except OSError:
+            continue
+        form = stream_reader.process_head(lines[0].strip("\n")) if len(lines) > 0 else None
+        if (form != None):
+            lformat = stream_reader.build_regex(form)
+            for line_num, line in enumerate(lines[1:], 2):
+                if (re.search(lformat, line) != None):
+                    udata = line.strip("\n").split(",")
+                    expected.append((int(udata[form["age"]]), udata[form["lname"]] + ", " + udata[form["fname"]]))
+                else:
+                    bad_lines.append(line_num)
+        if (expected != list(stream_reader.stream_records(url))):
+            return False
+        if (form == None):
+            continue
+        for rows in (False, True):
+            reported = []
+            report = lambda url, line_num, text: reported.append(line_num)
+            blocks = stream_reader.split_blocks(body[i:i + 997] for i in range(0, len(body), 997))
+            if (rows):
+                found = [age for age, offset in stream_reader.parse_rows(url, blocks, stream_reader.build_row_parser(form), len(header), 1, report)]
+            else:
+                found = [age for age, name in stream_reader.parse_blocks(url, blocks, stream_reader.build_parser(form), 1, report)]
+            if (reported != bad_lines or found != [age for age, name in expected]):
+                return False
 
-    return reg + "$"
+    return True
 
-def process_head(header):
+def check_ranges(file_urls):
     """
-    Processes the first line of the provided CSV file and returns a dictionary corresponding the order of the lname, fname, and age parameters.
+    Splits every URL into byte ranges processed by separate workers and compares the merged histogram summary with a serial pass over the same URLs.
     """
-    fdict = {}
-    hformat = r"(?i)^( ?\w{2,20}\,){2} ?\w{2,20}$"
-    if (re.search(hformat, header) == None):
-        return None
-    params = [p.strip(" ") for p in header.split(",")]
+    serial = hist_median.summarize_records(rec for url in file_urls for rec in stream_reader.stream_records(url))
+    hist = [0] * hist_median.AGE_SLOTS
+    names = [None] * hist_median.AGE_SLOTS
+    total, processed = 0, 0
+    for summary in parallel.map_summaries(hist_median.summarize_records, file_urls, 2, split_size=1):
+        stotal, sprocessed = hist_median.merge_summary(hist, names, summary)
+        total += stotal
+        processed += sprocessed
+
+    return serial == (total, processed, hist, names)
+
+def check_incremental(file_urls, expected):
+    """
+    Writes the first half of every URL to a temporary copy, processes the copies incrementally, appends the remaining halves and checks that the incremental result matches the expected full result. Then truncates every copy in place and grows it back past the consumed offset with its second half altered, and checks that the copies are re-read in full.
+    """
+    with tempfile.TemporaryDirectory() as work_dir:
+        copies = [os.path.join(work_dir, str(i) + ".csv") for i in range(len(file_urls))]
+        contents = []
+        for url, copy in zip(file_urls, copies):
+            try:
+                with open(url, 'rb') as filein:
+                    contents.append(filein.read())
+            except OSError:
+                contents.append(None)
+                continue
+            with open(copy, 'wb') as fileout:
+                fileout.write(contents[-1][:len(contents[-1]) // 2])
+        state_path = os.path.join(work_dir, "state.json")
+        incremental.compute_stats(copies, state_path)
+        for copy, data in zip(copies, contents):
+            if (data != None):
+                with open(copy, 'ab') as fileout:
+                    fileout.write(data[len(data) // 2:])
+
+        if (incremental.compute_stats(copies, state_path) != expected):
+            return False
+        for copy, data in zip(copies, contents):
+            if (data != None):
+                with open(copy, 'r+b') as fileout:
+                    fileout.truncate(0)
+                    fileout.write(data[:len(data) // 2] + data[len(data) // 2:].replace(b"1", b"2") + data[data.find(b"\n") + 1:])
+
+        return incremental.compute_stats(copies, state_path) == hist_median.compute_stats(copies)
+
+def check_cache(file_urls, expected):
+    """
+    Runs the histogram engine with a summary cache cold, then warm, then with a copy of the first URL touched (served again after hashing) and rewritten with the same size (summarized again), checking every result.
+    """
+    with tempfile.TemporaryDirectory() as cache_dir:
+        if (not all(hist_median.compute_stats(file_urls, cache_dir=cache_dir) == expected for run in range(2))): # cold, then warm
+            return False
+        path = os.path.join(cache_dir, "copy.csv")
+        with open(file_urls[0], 'rb') as filein:
+            data = filein.read()
+        with open(path, 'wb') as fileout:
+            fileout.write(data)
+        first = hist_median.compute_stats([path], cache_dir=cache_dir)
+        os.utime(path, ns=(0, 0))
+        touched = hist_median.compute_stats([path], cache_dir=cache_dir)
+        with open(path, 'wb') as fileout:
+            fileout.write(data.replace(b"1", b"2"))
+        changed = hist_median.compute_stats([path], cache_dir=cache_dir)
+
+    return first == touched == hist_median.compute_stats(file_urls[:1]) and changed != first
+
+def check_window(file_urls, window=1000, step=997):
+    """
+    Compares the sliding window medians of heap_median.WindowedMedian with the median computed by the statistics module over each window.
+    """
+    all_ages = []
+    for url in file_urls:
+        process_file(url, all_ages)
+    for seen, med in heap_median.window_medians(file_urls, window, step):
+        if (med[0] != statistics.median(all_ages[max(0, seen - window):seen])):
+            return False
+
+    return True
+
+def check_quantiles(file_urls, qs=(0, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1)):
+    """
+    Compares the quantiles of every exact engine with the inclusive quantiles of the statistics module, which use the same q * (n - 1) position (interpolated values may differ in the last bit).
+    """
+    all_ages = []
+    for url in file_urls:
+        process_file(url, all_ages)
+    if (len(all_ages) < 2):
+        return True
+    cuts = statistics.quantiles(all_ages, n=100, method="inclusive")
+    expected = [min(all_ages) if q == 0 else max(all_ages) if q == 1 else cuts[round(q * 100) - 1] for q in qs]
+    for engine in (heap_median, hist_median, np_median, qs_median, stat_median):
+        ages = [age for q, age, entity in engine.quantiles(file_urls, qs)]
+        if (not all(math.isclose(age, exp) for age, exp in zip(ages, expected))):
+            return False
+
+    return True
+
+def check_compressed(file_urls):
+    """
+    Writes gzip (as two concatenated members), bz2 and xz copies of every URL and checks that the histogram and quickselect engines reach the same result over each set of copies as over the plain files, with decompression both inline and in a background thread.
+    """
+    expected = [engine.compute_stats(file_urls) for engine in (hist_median, qs_median)]
+    with tempfile.TemporaryDirectory() as work_dir:
+        copies = {"gz": [], "bz2": [], "xz": []}
+        for i, url in enumerate(file_urls):
+            try:
+                with open(url, 'rb') as filein:
+                    data = filein.read()
+            except OSError:
+                data = None
+            for ext, compress in (("gz", lambda data: gzip.compress(data[:len(data) // 2]) + gzip.compress(data[len(data) // 2:])), ("bz2", bz2.compress), ("xz", lzma.compress)):
+                copies[ext].append(os.path.join(work_dir, str(i) + ".csv." + ext))
+                if (data != None):
+                    with open(copies[ext][-1], 'wb') as fileout:
+                        fileout.write(compress(data))
+        for threaded in (False, True):
+            compressed_io.THREADED = threaded
+            for urls in copies.values():
+                if ([engine.compute_stats(urls) for engine in (hist_median, qs_median)] != expected):
+                    return False
+
+    return True
+
+def check_columnar(file_urls):
+    """
+    Converts the URLs into a columnar file in two segments (the first half of the URLs, then all of them, so only the second half is appended) and checks that the histogram, quickselect and heap engines reach the same result and quantiles over it as over the csv files, that every engine reaches the same result over the columnar file listed twice in a row as over the csv files listed twice (serially and in parallel), and that the last row of each copy is named alike.
+    """
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "records.agecol")
+        preprocess.convert(path, file_urls[:len(file_urls) // 2])
+        preprocess.convert(path, file_urls)
+        if (preprocess.convert(path, file_urls) != (0, 0)):
+            return False
+        for engine in (hist_median, qs_median, heap_median):
+            if (engine.compute_stats([path]) != engine.compute_stats(file_urls) or engine.quantiles([path]) != engine.quantiles(file_urls)):
+                return False
+        for engine in (stat_median, hist_median, qs_median, heap_median, np_median):
+            for workers in (1, 2):
+                if (engine.compute_stats([path, path], workers=workers) != engine.compute_stats(file_urls + file_urls, workers=workers)):
+                    return False
+        for workers in (1, 2):
+            store = record_store.load([path, path], workers=workers)
+            if (store.name(len(store) - 1) != store.name(len(store) // 2 - 1)):
+                return False
+
+    return True
+
+def check_remote(file_urls):
+    """
+    Serves every URL from a local HTTP/1.1 server and checks that the heap and quickselect engines reach the same result over http:// URLs as over the local paths (read ahead in threads over reused connections, with names resolved by range requests), with an unknown URL reported and skipped.
+    """
+    class Handler(SimpleHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def translate_path(self, path):
+            index = path.strip("/")
+            return file_urls[int(index)] if index.isdigit() and int(index) < len(file_urls) else "" # answered with a 404
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.handle_error = lambda request, address: None # clients abandoning a body reset the connection
+    threading.Thread(target=server.serve_forever, daemon=True).start()
     try:
-        fdict.update({"age" : params.index("age")})
-        fdict.update({"fname" : params.index("fname")})
-        fdict.update({"lname" : params.index("lname")})
-    except ValueError:
+        urls = ["http://127.0.0.1:" + str(server.server_port) + "/" + str(i) for i in range(len(file_urls))] + ["http://127.0.0.1:" + str(server.server_port) + "/missing"]
+        return all(engine.compute_stats(urls) == engine.compute_stats(file_urls) for engine in (heap_median, qs_median))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def check_sketch(file_urls):
+    """
+    Locates the approximate median of sketch_median among the exact sorted ages and checks that its distance from the true median rank is within the rank error bound reported by the sketch. Returns (passed, rank distance, bound).
+    """
+    all_ages = []
+    for url in file_urls:
+        process_file(url, all_ages)
+    all_ages.sort()
+    total, processed, sketch = sketch_median.compute_sketch(file_urls)
+    if (processed == 0):
+        return True, 0, 0
+    approx = sketch.median()
+    true_rank = (len(all_ages) - 1) / 2
+    distance = max(0, bisect.bisect_left(all_ages, approx) - true_rank, true_rank - bisect.bisect_right(all_ages, approx))
+    error, worst = sketch.rank_error()
+
+    return distance <= worst, distance, error
+
+def check_sketch_merge(files=100, rows=200000, k=16, qs=(0.1, 0.25, 0.5, 0.75, 0.9)):
+    """
+    Generates files csv files, sketches each one separately with a small k (serially and with two workers) and checks that the quantiles of the merged sketch are within its reported rank error of the exact ones, and that a file listed twice is sketched with different seeds.
+    """
+    with tempfile.TemporaryDirectory() as work_dir:
+        urls = gentestfile.generate(work_dir, rows, files, ages="wide")
+        all_ages = []
+        for url in urls:
+            process_file(url, all_ages)
+        all_ages.sort()
+        for workers in (1, 2):
+            total, processed, sketch = sketch_median.compute_sketch(urls, workers=workers, k=k)
+            error, worst = sketch.rank_error()
+            ranks = [int(q * (processed - 1)) for q in qs]
+            values = sketch.select_ranks(ranks)
+            if (processed != rows or any(max(0, bisect.bisect_left(all_ages, values[rank]) - rank, rank + 1 - bisect.bisect_right(all_ages, values[rank])) > error for rank in ranks)):
+                return False
+        twice = [sketch_median.KLLSketch.from_bytes(data).levels for total, processed, data in parallel.map_summaries(partial(sketch_median.summarize_records, k=k), urls[:1] * 2, 1, seeded=True)]
+
+    return twice[0] != twice[1]
+
+def check_groups(file_urls, expected):
+    """
+    Groups the records by file and by last name with group_median, serially and with two workers, and checks every group against the histogram engine run on that file alone or against statistics.median of the ages of that last name, and the global result against expected.
+    """
+    by_file, overall = group_median.compute_groups(file_urls)
+    for url in file_urls:
+        avg, med, procd = hist_median.compute_stats([url])
+        if (overall != expected or (procd > 0 and by_file[url] != (avg, med[0], procd))):
+            return False
+    by_lname = {}
+    for url in file_urls:
+        for age, name in stream_reader.stream_records(url):
+            by_lname.setdefault(name.split(",")[0].strip(), []).append(age)
+    brute = {lname: (round(statistics.mean(ages), 2), statistics.median(ages), len(ages)) for lname, ages in by_lname.items()}
+
+    return all(group_median.compute_groups(file_urls, "lname", workers=workers) == (brute, expected) for workers in (1, 2))
+
+def check_rank_index(file_urls, qs=(0, 0.1, 0.5, 0.9, 1)):
+    """
+    Builds a rank_index.RankIndex of the URLs and checks the ages at sampled ranks, counts below and medians of age ranges against the sorted ages, its quantiles against hist_median, that inserting and deleting records restores the original answers and that malformed query commands are answered with an error.
+    """
+    index = rank_index.build(file_urls)
+    all_ages = sorted(index.store.ages)
+    if (len(all_ages) == 0):
+        return len(index) == 0
+    ranks = sorted(set([0, len(all_ages) - 1] + list(range(0, len(all_ages), max(1, len(all_ages) // 97)))))
+    if (any(index.select(k)[0] != all_ages[k] for k in ranks) or any(index.count_below(x) != bisect.bisect_left(all_ages, x) for x in (-1, 0, 1, 20, 50, 100, 999, 1000))):
+        return False
+    for low, high in ((0, 999), (20, 40), (33, 33), (50, 20)):
+        inside = all_ages[bisect.bisect_left(all_ages, low):bisect.bisect_right(all_ages, high)]
+        if (index.range_median(low, high)[0] != (statistics.median(inside) if len(inside) > 0 else 0)):
+            return False
+    before = (index.median(), index.average(), len(index))
+    ids = [index.insert(age, "ZED, Test") for age in (0, 998, 45, 45)]
+    inserted = index.rank(len(index) - 1) == (998, "ZED, Test")
+    for entity in ids[1:] + [ids[0]]:
+        index.delete(entity)
+    if (any("error" not in rank_index.handle_command(index, command) for command in ("QUANTILES abc", "QUANTILES", "QUANTILES 1.5", "RANK", "RANK x"))):
+        return False
+
+    return inserted and (index.median(), index.average(), len(index)) == before and [q[:2] for q in index.quantiles(qs)] == [q[:2] for q in hist_median.quantiles(file_urls, qs)]
+
+class Crash(BaseException):
+    """Stands in for the process being killed: it is not an Exception, so nothing on the way up catches it."""
+
+def crash_after(run_checkpoint, saves):
+    """Makes a checkpoint raise Crash once it has saved the provided number of checkpoints."""
+    save = run_checkpoint.save
+
+    def crashing_save(*position):
+        save(*position)
+        run_checkpoint.saves = getattr(run_checkpoint, "saves", 0) + 1
+        if (run_checkpoint.saves == saves):
+            raise Crash()
+
+    run_checkpoint.save = crashing_save
+
+def check_checkpoint(file_urls, expected_hist, expected_heap, bufsize=1 << 12):
+    """
+    Runs the histogram engine serially and with two workers, and the heap engine, with a checkpoint saved after every block, crashes each run after a few checkpoints and checks that resuming from the checkpoint gives the result of an uninterrupted run and removes the checkpoint files.
+    """
+    runs = ((hist_median.compute_stats, "hist", 1, expected_hist), (hist_median.compute_stats, "hist", 2, expected_hist), (heap_median.compute_stats, "rows", 1, expected_heap))
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "run.checkpoint")
+        for compute, kind, workers, expected in runs:
+            for saves in (1, 5, 40):
+                crashing = checkpoint.Checkpoint(path, kind, file_urls, workers, 0)
+                crash_after(crashing, saves)
+                try:
+                    compute(file_urls, bufsize, workers, checkpoint=crashing)
+                except Crash:
+                    pass
+                resumed = checkpoint.Checkpoint(path, kind, file_urls, workers, resume=True)
+                if (compute(file_urls, bufsize, workers, checkpoint=resumed) != expected or len(os.listdir(work_dir)) != 0):
+                    return False
+
+    return True
+
+def check_report(file_urls, procd):
+    """
+    Runs the histogram engine with instrumentation on, serially and with two workers, and checks that both reports are JSON-serializable, account for every line read as processed or rejected, and agree on the rejected lines of every URL.
+    """
+    reports = []
+    for workers in (1, 2):
+        instrument.start()
+        hist_median.compute_stats(file_urls, workers=workers)
+        reports.append(json.loads(json.dumps(instrument.report())))
+    instrument.stop()
+    for report in reports:
+        if (report["lines"] - report["rejected"] != procd or report["rejected"] != sum(report["rejected_by_url"].values()) or set(report["stages"]) != set(instrument.STAGES)):
+            return False
+
+    return reports[0]["rejected_by_url"] == reports[1]["rejected_by_url"] and reports[0]["stages"]["select"]["calls"] == 1
+
+def check_numpy(file_urls, expected, bufsize=1 << 10):
+    """
+    Checks that np_median reaches the histogram engine's result and that its bulk parser, over small blocks, loads the same rows as record_store.load. Returns None when NumPy is not installed.
+    """
+    if (np_median.np == None):
         return None
+    store = np_median.load(file_urls, bufsize)
+    rows = record_store.load(file_urls)
+
+    return np_median.compute_stats(file_urls) == expected and (store.urls, store.starts, store.ages, store.offsets, store.total_age) == (rows.urls, rows.starts, rows.ages, rows.offsets, rows.total_age)
+
+def check_service(file_urls, expected):
+    """
+    Serves a median_service.MedianState on a Unix socket, sends it a malformed ADD, a FILE command for every URL and STATS until the files are ingested, then a valid ADD, and checks the replies against the heap engine's result.
+    """
+    async def session(socket_path):
+        state = median_service.MedianState()
+        server = await asyncio.start_unix_server(lambda reader, writer: median_service.serve_client(state, reader, writer), path=socket_path)
+        async with server:
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+
+            async def send(command):
+                writer.write((command + "\n").encode(stream_reader.ENCODING))
+                return json.loads(await reader.readline())
+
+            replies = [await send("ADD Ada, LOVELACE")] + [await send("FILE " + url) for url in file_urls]
+            stats = await send("STATS")
+            while (stats["pending_files"] > 0):
+                await asyncio.sleep(0.01)
+                stats = await send("STATS")
+            replies += [stats, await send("ADD Ada, LOVELACE, 36")]
+            writer.write(b"QUIT\n")
+            await reader.read()
+            writer.close()
+        return replies
+
+    with tempfile.TemporaryDirectory() as socket_dir:
+        replies = asyncio.run(session(os.path.join(socket_dir, "service.sock")))
+    avg, med, procd = expected
+    stats = replies[-2]
+
+    return "error" in replies[0] and replies[1:-2] == [{"queued": url} for url in file_urls] and (stats["average"], stats["median"], stats["count"]) == (avg, med[0], procd) and replies[-1] == {"count": procd + 1}
 
-    return fdict
 
 
 if __name__=='__main__':
@@ -102,9 +456,48 @@ if __name__=='__main__':
     savg, smed, sprocd = stat_median.compute_stats(file_urls)
     havg, hmed, hprocd = heap_median.compute_stats(file_urls)
     qavg, qmed, qprocd = qs_median.compute_stats(file_urls)
+    cavg, cmed, cprocd = hist_median.compute_stats(file_urls)
+    navg, nmed, nprocd = np_median.compute_stats(file_urls)
+    parser_ok = check_parser(file_urls)
+    cache_ok = check_cache(file_urls, (cavg, cmed, cprocd))
+    window_ok = check_window(file_urls)
+    quantiles_ok = check_quantiles(file_urls)
+    sketch_ok, sketch_dist, sketch_err = check_sketch(file_urls)
+    sketch_merge_ok = check_sketch_merge()
+    incremental_ok = check_incremental(file_urls, (cavg, cmed, cprocd))
+    parallel_ok = hist_median.compute_stats(file_urls, workers=2) == (cavg, cmed, cprocd) and check_ranges(file_urls)
+    remote_ok = check_remote(file_urls)
+    compressed_ok = check_compressed(file_urls)
+    columnar_ok = check_columnar(file_urls)
+    report_ok = check_report(file_urls, cprocd)
+    groups_ok = check_groups(file_urls, (cavg, cmed, cprocd))
+    rank_ok = check_rank_index(file_urls)
+    checkpoint_ok = check_checkpoint(file_urls, (cavg, cmed, cprocd), (havg, hmed, hprocd))
+    service_ok = check_service(file_urls, (havg, hmed, hprocd))
+    numpy_ok = check_numpy(file_urls, (cavg, cmed, cprocd))
     print("-"*30, "\nResults:\n")
-    print("Average test passed: ", (tavg==havg and havg==qavg and qavg==savg))
-    print("Median test passed: ", (tmed==hmed[0]) and hmed[0]==qmed[0] and qmed[0]==smed[0])
+    print("Average test passed: ", (tavg==havg and havg==qavg and qavg==savg and savg==cavg and cavg==navg))
+    print("Median test passed: ", (tmed==hmed[0]) and hmed[0]==qmed[0] and qmed[0]==smed[0] and smed[0]==cmed[0] and cmed[0]==nmed[0])
+    print("Parser test passed: ", parser_ok)
+    print("Parallel test passed: ", parallel_ok)
+    print("Cache test passed: ", cache_ok)
+    print("Remote test passed: ", remote_ok)
+    print("Compressed test passed: ", compressed_ok)
+    print("Columnar test passed: ", columnar_ok)
+    print("Report test passed: ", report_ok)
+    print("Groups test passed: ", groups_ok)
+    print("Rank index test passed: ", rank_ok)
+    print("Checkpoint test passed: ", checkpoint_ok)
+    print("Service test passed: ", service_ok)
+    if (numpy_ok != None):
+        print("NumPy test passed: ", numpy_ok)
+    else:
+        print("NumPy test skipped: NumPy not installed")
+    print("Incremental test passed: ", incremental_ok)
+    print("Window test passed: ", window_ok)
+    print("Quantiles test passed: ", quantiles_ok)
+    print("Sketch test passed: ", sketch_ok, "(rank distance", sketch_dist, ", bound", sketch_err, ")")
+    print("Sketch merge test passed: ", sketch_merge_ok)
     print("-"*30)
     print("Python std library - statistics results:\n")
     print("Average: ", tavg, " Median: ", tmed)
@@ -117,3 +510,9 @@ if __name__=='__main__':
     print("-"*30)
     print("TimSort (same as std library - statistics) resutls:")
     print("Average: ", savg, " Median: ", smed[0])
+    print("-"*30)
+    print("Histogram (counting select) results:")
+    print("Average: ", cavg, " Median: ", cmed[0])
+    print("-"*30)
+    print("NumPy results:" if np_median.np != None else "NumPy results (NumPy not installed, using histogram):")
+    print("Average: ", navg, " Median: ", nmed[0])
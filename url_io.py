@@ -0,0 +1,206 @@
+"""
+        Author: Spencer Little (mrlittle@uw.edu)
+        Last edit: 10/18/2026
+        Opens the URLs passed to the median modules, which may be local paths or http(s):// addresses, and reads ahead of the parser. HTTP connections are kept alive and reused for later requests to the same host, and prefetch reads the next URLs with a bounded pool of threads while the current one is parsed, so thousands of inputs are not opened and read one blocking call at a time.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import http.client
+import queue
+import threading
+
+PREFETCH = 16 # URLs opened and read ahead of the one being parsed
+QUEUE_CHUNKS = 4 # chunks buffered for each URL read ahead
+PREFETCH_LOCAL = False # read local paths ahead too; worth it on network or cold disks, but on a warm page cache a thread handoff costs more than the read
+TIMEOUT = 30 # seconds to wait on an HTTP connection
+POLL = 0.1 # seconds between checks for a cancelled read
+
+local = threading.local() # HTTP connections of each thread, by (scheme, host)
+
+
+def is_remote(url):
+    """Returns True if url is an http:// or https:// address rather than a local path."""
+    return urlsplit(url).scheme.lower() in ("http", "https")
+
+def open_url(url, start=0):
+    """
+    Opens url for binary reading from byte start. Local paths are opened as files; http(s) URLs are requested with a GET (a Range request when start > 0) over a kept-alive connection of the calling thread. Raises FileNotFoundError for a missing file or a 404 status and OSError for any other failure.
+    """
+    if (not is_remote(url)):
+        filein = open(url, 'rb')
+        if (start > 0):
+            filein.seek(start)
+        return filein
+
+    return HTTPBody(url, start)
+
+def prefetch(file_urls, bufsize, depth=PREFETCH):
+    """
+    Yields (url, chunks) for every url in file_urls in order, where chunks iterates over the contents of url in chunks of at most bufsize bytes. Up to depth remote URLs (and local paths with PREFETCH_LOCAL) are opened and read at once by a pool of threads while earlier URLs are parsed, each into a queue of at most QUEUE_CHUNKS chunks, so memory stays bounded however many URLs there are. An error raised while reading a URL is raised again from its chunks in the consuming thread, so it is reported and skipped like any other read error. A URL whose chunks are not consumed to the end is abandoned when the next one is requested.
+    """
+    file_urls = list(file_urls)
+    if (depth <= 1 or (not PREFETCH_LOCAL and not any(map(is_remote, file_urls)))):
+        for url in file_urls:
+            yield url, read_url(url, bufsize)
+        return
+
+    urls = iter(file_urls)
+    ahead = deque()
+    with ThreadPoolExecutor(depth) as pool:
+        try:
+            for url in urls:
+                if (PREFETCH_LOCAL or is_remote(url)):
+                    ahead.append(start_read(pool, url, bufsize))
+                else:
+                    ahead.append((url, read_url(url, bufsize), threading.Event()))
+                if (len(ahead) == depth):
+                    url, chunks, stop = ahead[0]
+                    yield url, chunks
+                    stop.set()
+                    ahead.popleft()
+            while (len(ahead) > 0):
+                url, chunks, stop = ahead[0]
+                yield url, chunks
+                stop.set()
+                ahead.popleft()
+        finally:
+            for url, chunks, stop in ahead:
+                stop.set()
+
+def read_url(url, bufsize):
+    """Yields successive chunks of at most bufsize bytes of url."""
+    with open_url(url) as filein:
+        while True:
+            chunk = filein.read(bufsize)
+            if (not chunk):
+                return
+            yield chunk
+
+def start_read(pool, url, bufsize):
+    """Submits the read of url to the thread pool. Returns (url, generator over the chunks read, event cancelling the read)."""
+    return (url,) + in_background(read_url(url, bufsize), pool.submit)
+
+def in_background(items, submit=None):
+    """
+    Runs an iterator in a background thread (a new daemon thread, or the one picked by submit(function, *args) such as a thread pool's) that stays at most QUEUE_CHUNKS items ahead. Returns (generator over the items, event cancelling the thread).
+    """
+    chunks = queue.Queue(QUEUE_CHUNKS)
+    stop = threading.Event()
+    if (submit == None):
+        threading.Thread(target=fill, args=(items, chunks, stop), daemon=True).start()
+    else:
+        submit(fill, items, chunks, stop)
+    return drain(chunks, stop), stop
+
+def fill(items, chunks, stop):
+    """Puts the items into the queue as (item, None) followed by (None, None), or (None, error) if the iterator failed. Gives up as soon as stop is set."""
+    try:
+        for chunk in items:
+            if (not put(chunks, (chunk, None), stop)):
+                return
+    except Exception as err:
+        put(chunks, (None, err), stop)
+        return
+    put(chunks, (None, None), stop)
+
+def put(chunks, item, stop):
+    """Puts an item in a bounded queue, waiting for room until stop is set. Returns False if the read was cancelled."""
+    while (not stop.is_set()):
+        try:
+            chunks.put(item, timeout=POLL)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def drain(chunks, stop):
+    """Yields the chunks filled into the queue, raising the error of a failed read. Closing the generator cancels the read."""
+    try:
+        while True:
+            chunk, err = chunks.get()
+            if (err != None):
+                raise err
+            if (chunk == None):
+                return
+            yield chunk
+    finally:
+        stop.set()
+
+
+class HTTPBody:
+    """
+    The body of an HTTP response, read like a binary file. The connection it arrived on goes back to its thread's pool for reuse when the body has been read to the end; a body closed early leaves its connection unusable, so the connection is closed instead.
+    """
+
+    def __init__(self, url, start=0):
+        parts = urlsplit(url)
+        self.key = (parts.scheme.lower(), parts.netloc)
+        self.pool = connections()
+        path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        headers = {"Range": "bytes=" + str(start) + "-"} if start > 0 else {}
+        self.response = request(self.pool, self.key, path, headers)
+        if (self.response.status == 404):
+            self.response.read() # keeps the connection usable
+            raise FileNotFoundError("HTTP 404 for " + url)
+        if (self.response.status not in (200, 206)):
+            self.response.read()
+            raise OSError("HTTP " + str(self.response.status) + " " + self.response.reason + " for " + url)
+        if (start > 0 and self.response.status == 200): # server ignored the range
+            self.response.read(start)
+
+    def read(self, size=-1):
+        try:
+            return self.response.read(None if size < 0 else size)
+        except http.client.HTTPException as err:
+            raise OSError("HTTP error: " + repr(err)) from err
+
+    def readline(self):
+        return self.response.readline()
+
+    def peek(self, size=1):
+        return self.response.peek(size)
+
+    def close(self):
+        if (not self.response.isclosed()):
+            self.response.close()
+            drop(self.pool, self.key)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def connections():
+    """Returns the pool of HTTP connections of the calling thread (connections cannot be shared between threads)."""
+    if (not hasattr(local, "pool")):
+        local.pool = {}
+    return local.pool
+
+def request(pool, key, path, headers):
+    """
+    Sends a GET for path over the pooled connection to key = (scheme, host), opening one if needed. A kept-alive connection may have been closed by the server since its last use, so a failed request is retried once on a new connection. Returns the response.
+    """
+    for attempt in range(2):
+        conn = pool.get(key)
+        fresh = conn == None
+        if (fresh):
+            conn = (http.client.HTTPSConnection if key[0] == "https" else http.client.HTTPConnection)(key[1], timeout=TIMEOUT)
+            pool[key] = conn
+        try:
+            conn.request("GET", path, headers=headers)
+            return conn.getresponse()
+        except (http.client.HTTPException, OSError) as err:
+            drop(pool, key)
+            if (fresh):
+                raise err if isinstance(err, OSError) else OSError("HTTP error: " + repr(err))
+
+def drop(pool, key):
+    """Closes and forgets the pooled connection to key."""
+    conn = pool.pop(key, None)
+    if (conn != None):
+        conn.close()